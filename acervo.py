@@ -0,0 +1,314 @@
+from __future__ import annotations
+from typing import Iterable, Iterator
+from ed import array2d_tipado
+from tad import Catalogo, Figurinha
+
+
+class Acervo:
+    '''
+    As colecoes de muitos usuarios guardadas juntas numa matriz
+    usuarios x figurinhas de quantidades (um array2d_tipado): a linha u
+    eh a colecao do usuario u e a coluna n eh a figurinha n. A coluna 0
+    nao eh usada, como no array de tad.Colecao.
+
+    Cada usuario eh so uma linha da matriz, e nao um objeto Colecao com
+    um objeto Figurinha por posicao. Perguntas sobre todos os usuarios
+    (quem tem a figurinha n repetida?) viram uma leitura de coluna, que
+    eh uma fatia com passo (uma posicao a cada linha, entao nao eh
+    contigua), e perguntas sobre um usuario viram uma leitura da linha,
+    que eh contigua. Novos usuarios sao acrescentados em blocos de linhas.
+
+    As quantidades sao do *tipo* do array ('H' por padrao, ate 65535).
+    Uma adicao que passaria do maximo do tipo da OverflowError antes de
+    mudar qualquer quantidade.
+
+    Exemplos:
+    >>> acervo = Acervo(Catalogo(10))
+    >>> ana = acervo.adiciona_usuario('ana')
+    >>> bia = acervo.adiciona_usuario('bia')
+    >>> ana.adiciona_lote([1, 1, 2, 7, 7])
+    >>> bia.adiciona_lote([2, 2, 3])
+    >>> ana.gera_figurinhas_presentes()
+    '1, 2, 7'
+    >>> acervo.usuarios_com_repetida(7)
+    ['ana']
+    >>> acervo.usuarios_sem(7)
+    ['bia']
+    >>> acervo.colecao('bia').gera_figurinhas_repetidas()
+    '2 (1)'
+    >>> len(acervo)
+    2
+    '''
+    catalogo: Catalogo
+    contagens: array2d_tipado
+    nomes: list[str]
+    indices: dict[str, int]
+    maximo: int
+
+    def __init__(self, catalogo: Catalogo, bloco: int = 64, tipo: str = 'H'):
+        self.catalogo = catalogo
+        self.contagens = array2d_tipado(0, catalogo.tamanho + 1, 0, tipo, bloco)
+        self.nomes = []
+        self.indices = {}
+        bits = 8 * self.contagens.valores.itemsize
+        if tipo.isupper():
+            self.maximo = (1 << bits) - 1
+        else:
+            self.maximo = (1 << (bits - 1)) - 1
+
+    def __len__(self) -> int:
+        return len(self.nomes)
+
+    def adiciona_usuario(self, nome: str) -> VisaoColecao:
+        '''
+        Cria uma colecao vazia para *nome* e retorna a visao dela.
+        '''
+        if nome in self.indices:
+            raise ValueError('usuario ' + nome + ' ja existe')
+
+        linha = self.contagens.adiciona_linhas(1)
+        self.nomes.append(nome)
+        self.indices[nome] = linha
+        return VisaoColecao(self, linha)
+
+    def colecao(self, nome: str) -> VisaoColecao:
+        return VisaoColecao(self, self.indices[nome])
+
+    def usuarios_com(self, numero: int) -> list[str]:
+        '''
+        Quem tem a figurinha *numero*, na ordem em que os usuarios entraram.
+        '''
+        coluna = self.contagens.coluna(numero)
+        return [self.nomes[u] for u in range(len(coluna)) if coluna[u] > 0]
+
+    def usuarios_com_repetida(self, numero: int) -> list[str]:
+        '''
+        Quem tem a figurinha *numero* repetida.
+        '''
+        coluna = self.contagens.coluna(numero)
+        return [self.nomes[u] for u in range(len(coluna)) if coluna[u] > 1]
+
+    def usuarios_sem(self, numero: int) -> list[str]:
+        '''
+        Quem nao tem a figurinha *numero*.
+        '''
+        coluna = self.contagens.coluna(numero)
+        return [self.nomes[u] for u in range(len(coluna)) if coluna[u] == 0]
+
+    def total_por_figurinha(self) -> list[int]:
+        '''
+        Quantas figurinhas de cada numero existem somando todos os usuarios
+        (a posicao 0 nao eh usada).
+
+        Exemplos:
+        >>> acervo = Acervo(Catalogo(3))
+        >>> acervo.adiciona_usuario('ana').adiciona_lote([1, 3, 3])
+        >>> acervo.adiciona_usuario('bia').adiciona_lote([3])
+        >>> acervo.total_por_figurinha()
+        [0, 1, 0, 3]
+        '''
+        return [sum(self.contagens.coluna(n)) for n in range(self.contagens.cols)]
+
+
+class VisaoColecao:
+    '''
+    A colecao de um usuario de um Acervo, com os mesmos metodos de
+    tad.Colecao. Todas as leituras e escritas vao direto para a linha do
+    usuario na matriz do acervo.
+
+    Exemplos:
+    >>> acervo = Acervo(Catalogo(20))
+    >>> c = acervo.adiciona_usuario('c')
+    >>> for n in [2, 2, 4, 4, 7, 7, 1, 1]:
+    ...     c.adiciona_figurinha(Figurinha(n))
+    >>> d = acervo.adiciona_usuario('d')
+    >>> for n in [2, 6, 6, 8, 8, 10, 10]:
+    ...     d.adiciona_figurinha(Figurinha(n))
+    >>> c.conta_figurinhas_trocaveis(d), d.conta_figurinhas_trocaveis(c)
+    (3, 3)
+    >>> c.troca_maxima(d)
+    >>> c.gera_figurinhas_presentes()
+    '1, 2, 4, 6, 7, 8, 10'
+    >>> c.gera_figurinhas_repetidas()
+    '2 (1)'
+    >>> d.gera_figurinhas_repetidas()
+    ''
+    >>> d.conta_faltantes()
+    13
+    >>> c.adiciona_figurinha(Figurinha(21))
+    Traceback (most recent call last):
+    ...
+    ValueError: figurinha 21 fora do album
+    >>> pequeno = Acervo(Catalogo(5), tipo='B')
+    >>> e = pequeno.adiciona_usuario('e')
+    >>> e.adiciona_lote([3] * 255)
+    >>> e.adiciona_lote([1, 2, 3])
+    Traceback (most recent call last):
+    ...
+    OverflowError: figurinha 3 passaria de 255
+    >>> e.quantidade_de(1), e.quantidade_de(3)
+    (0, 255)
+    '''
+    acervo: Acervo
+    linha: int
+
+    def __init__(self, acervo: Acervo, linha: int):
+        self.acervo = acervo
+        self.linha = linha
+
+    def inicio(self) -> int:
+        return self.linha * self.acervo.contagens.cols
+
+    def quantidades(self):
+        '''
+        Uma copia da linha do usuario: a posicao n tem a quantidade da
+        figurinha n.
+        '''
+        return self.acervo.contagens.linha(self.linha)
+
+    def valida(self, numero: int) -> bool:
+        catalogo = self.acervo.catalogo
+        if catalogo.valida(numero):
+            return True
+        if catalogo.invalidas == 'erro':
+            raise ValueError('figurinha ' + str(numero) + ' fora do album')
+        return False
+
+    def adiciona_figurinha(self, figurinha: Figurinha) -> None:
+        self.adiciona_numero(figurinha.numero)
+
+    def adiciona_numero(self, numero: int) -> None:
+        if self.valida(numero):
+            valores = self.acervo.contagens.valores
+            if valores[self.inicio() + numero] >= self.acervo.maximo:
+                raise OverflowError('figurinha ' + str(numero) + ' passaria de ' + str(self.acervo.maximo))
+            valores[self.inicio() + numero] = valores[self.inicio() + numero] + 1
+
+    def adiciona_lote(self, numeros: Iterable[int]) -> None:
+        '''
+        Adiciona varias figurinhas. O lote inteiro eh conferido (catalogo
+        e maximo do tipo) antes de mudar qualquer quantidade.
+        '''
+        contagens: dict[int, int] = {}
+        for numero in numeros:
+            if self.valida(numero):
+                contagens[numero] = contagens.get(numero, 0) + 1
+
+        valores = self.acervo.contagens.valores
+        inicio = self.inicio()
+        for numero in sorted(contagens):
+            if valores[inicio + numero] + contagens[numero] > self.acervo.maximo:
+                raise OverflowError('figurinha ' + str(numero) + ' passaria de ' + str(self.acervo.maximo))
+
+        for numero, quantidade in contagens.items():
+            valores[inicio + numero] = valores[inicio + numero] + quantidade
+
+    def remove_figurinha(self, figurinha: Figurinha) -> None:
+        self.remove_numero(figurinha.numero)
+
+    def remove_numero(self, numero: int) -> None:
+        if self.acervo.catalogo.valida(numero):
+            valores = self.acervo.contagens.valores
+            if valores[self.inicio() + numero] > 0:
+                valores[self.inicio() + numero] = valores[self.inicio() + numero] - 1
+
+    def quantidade_de(self, numero: int) -> int:
+        if not self.acervo.catalogo.valida(numero):
+            return 0
+        return self.acervo.contagens.valores[self.inicio() + numero]
+
+    def itera_quantidades(self) -> Iterator[tuple[int, int]]:
+        linha = self.quantidades()
+        for numero in range(1, len(linha)):
+            if linha[numero] > 0:
+                yield (numero, linha[numero])
+
+    @property
+    def presentes_bits(self) -> int:
+        bits = 0
+        for numero, _ in self.itera_quantidades():
+            bits = bits | (1 << numero)
+        return bits
+
+    @property
+    def repetidas_bits(self) -> int:
+        bits = 0
+        for numero, quantidade in self.itera_quantidades():
+            if quantidade > 1:
+                bits = bits | (1 << numero)
+        return bits
+
+    def gera_figurinhas_presentes(self) -> str:
+        return ", ".join(str(numero) for numero, _ in self.itera_quantidades())
+
+    def gera_figurinhas_repetidas(self) -> str:
+        return ", ".join(str(numero) + " (" + str(quantidade - 1) + ")"
+                         for numero, quantidade in self.itera_quantidades() if quantidade > 1)
+
+    def tamanho_do_album(self) -> int:
+        return self.acervo.catalogo.tamanho
+
+    def iter_faltantes(self) -> Iterator[int]:
+        linha = self.quantidades()
+        for numero in range(1, len(linha)):
+            if linha[numero] == 0:
+                yield numero
+
+    def conta_faltantes(self) -> int:
+        return self.quantidades()[1:].count(0)
+
+    def gera_figurinhas_faltantes(self) -> str:
+        return ", ".join(str(numero) for numero in self.iter_faltantes())
+
+    def conta_figurinhas_trocaveis(self, colecao_destino) -> int:
+        '''
+        Conta quantas figurinhas repetidas eu tenho que *colecao_destino*
+        nao tem. Entre duas visoes do mesmo acervo compara as duas linhas
+        direto; com outra colecao qualquer, usa os bits dela.
+        '''
+        if isinstance(colecao_destino, VisaoColecao) and colecao_destino.acervo is self.acervo:
+            minha = self.quantidades()
+            outra = colecao_destino.quantidades()
+            return sum(1 for n in range(1, len(minha)) if minha[n] > 1 and outra[n] == 0)
+        return (self.repetidas_bits & ~colecao_destino.presentes_bits).bit_count()
+
+    def proximo_numero_trocavel(self, colecao_destino, indice_inicial: int) -> int:
+        minha = self.quantidades()
+        for numero in range(max(indice_inicial, 1), len(minha)):
+            if minha[numero] > 1 and colecao_destino.quantidade_de(numero) == 0:
+                return numero
+        return -1
+
+    def encontra_proxima_figurinha_trocavel(self, colecao_destino, indice_inicial: int) -> Figurinha:
+        numero = self.proximo_numero_trocavel(colecao_destino, indice_inicial)
+        if numero == -1:
+            return Figurinha(0)
+        return Figurinha(numero)
+
+    def troca_maxima(self, colecao2: VisaoColecao) -> None:
+        '''
+        A mesma troca de tad.Colecao.troca_maxima, entre dois usuarios.
+        '''
+        numero_de_trocas = min(self.conta_figurinhas_trocaveis(colecao2), colecao2.conta_figurinhas_trocaveis(self))
+
+        trocas_realizadas = 0
+        indice_col1 = 0
+        indice_col2 = 0
+        continuar = True
+
+        while trocas_realizadas < numero_de_trocas and continuar:
+            numero_para_col2 = self.proximo_numero_trocavel(colecao2, indice_col1)
+            numero_para_col1 = colecao2.proximo_numero_trocavel(self, indice_col2)
+
+            if numero_para_col2 != -1 and numero_para_col1 != -1:
+                self.remove_numero(numero_para_col2)
+                colecao2.adiciona_numero(numero_para_col2)
+
+                colecao2.remove_numero(numero_para_col1)
+                self.adiciona_numero(numero_para_col1)
+
+                trocas_realizadas += 1
+                indice_col1 = numero_para_col2 + 1
+                indice_col2 = numero_para_col1 + 1
+            else:
+                continuar = False
@@ -0,0 +1,436 @@
+from __future__ import annotations
+from typing import Iterable, Iterator, TextIO
+import tad
+import tad_encad as encadeada
+from album.figurinha import Figurinha
+
+
+class Colecao:
+    '''
+    Uma colecao de figurinhas que escolhe sozinha como se guardar.
+
+    Enquanto a colecao eh esparsa (poucas figurinhas distintas perto do
+    maior numero que ela tem) ela usa a lista encadeada de tad_encad.py,
+    que so gasta memoria com o que existe. Quando fica densa, passa a
+    usar o array de tad.py, que eh mais rapido. A densidade eh
+    (figurinhas distintas) / (maior numero), e eh verificada depois de
+    cada alteracao.
+
+    Para nao ficar trocando de representacao a cada figurinha, os limites
+    sao diferentes nos dois sentidos: vira densa quando a densidade chega
+    a *limite_denso* e so volta a ser esparsa quando cai abaixo de
+    *limite_esparso*.
+
+    Numa colecao pequena uma figurinha so muda muito a densidade (com as
+    figurinhas 1 e 300 ela eh 2/300, sem a 300 eh 1), e os limites nao
+    bastam. Por isso a colecao so vira densa quando tem pelo menos
+    *minimo_distintas* figurinhas distintas. Ate la a lista eh pequena e
+    a representacao nao faz diferenca.
+
+    Exemplos:
+    >>> c = Colecao()
+    >>> c.representacao()
+    'esparsa'
+    >>> c.adiciona_lote([5, 300])
+    >>> c.representacao()
+    'esparsa'
+    >>> c.adiciona_lote(range(1, 200))
+    >>> c.representacao()
+    'densa'
+    >>> c.gera_figurinhas_repetidas()
+    '5 (1)'
+    >>> for n in range(1, 100):
+    ...     c.remove_numero(n)
+    >>> c.representacao()
+    'densa'
+    >>> for n in range(100, 131):
+    ...     c.remove_numero(n)
+    >>> c.representacao()
+    'esparsa'
+    >>> c.gera_figurinhas_repetidas()
+    ''
+    >>> c.conta_faltantes()
+    229
+
+    Uma colecao pequena nao fica trocando de representacao:
+
+    >>> p = Colecao()
+    >>> p.adiciona_numero(1)
+    >>> p.representacao()
+    'esparsa'
+    >>> p.adiciona_numero(300)
+    >>> p.remove_numero(300)
+    >>> p.representacao()
+    'esparsa'
+    >>> p.adiciona_numero(300)
+    >>> p.representacao()
+    'esparsa'
+    '''
+    limite_denso: float
+    limite_esparso: float
+    minimo_distintas: int
+    colecao: tad.Colecao | encadeada.Colecao
+
+    def __init__(self, limite_denso: float = 0.5, limite_esparso: float = 0.25, minimo_distintas: int = 64):
+        '''
+        Cria uma colecao vazia (esparsa).
+
+        Exemplos:
+        >>> Colecao(0.2, 0.4)
+        Traceback (most recent call last):
+        ...
+        ValueError: limite_esparso deve ser menor que limite_denso
+        '''
+        if limite_esparso >= limite_denso:
+            raise ValueError('limite_esparso deve ser menor que limite_denso')
+        self.limite_denso = limite_denso
+        self.limite_esparso = limite_esparso
+        self.minimo_distintas = minimo_distintas
+        self.colecao = encadeada.Colecao()
+
+    def representacao(self) -> str:
+        if isinstance(self.colecao, tad.Colecao):
+            return 'densa'
+        return 'esparsa'
+
+    def densidade(self) -> float:
+        maior = self.colecao.presentes_bits.bit_length() - 1
+        if maior <= 0:
+            return 0.0
+        return self.colecao.presentes_bits.bit_count() / maior
+
+    def ajusta(self) -> None:
+        '''
+        Troca a representacao se a densidade passou de algum dos limites
+        (e, para virar densa, se a colecao tem o tamanho minimo).
+        A troca copia as figurinhas de uma vez com aplica_diff.
+        '''
+        densidade = self.densidade()
+        distintas = self.colecao.presentes_bits.bit_count()
+
+        if (self.representacao() == 'esparsa' and densidade >= self.limite_denso
+                and distintas >= self.minimo_distintas):
+            nova = tad.Colecao()
+        elif self.representacao() == 'densa' and densidade < self.limite_esparso:
+            nova = encadeada.Colecao()
+        else:
+            return
+
+        nova.aplica_diff(list(self.colecao.itera_quantidades()))
+        self.colecao = nova
+
+    @property
+    def presentes_bits(self) -> int:
+        return self.colecao.presentes_bits
+
+    @property
+    def repetidas_bits(self) -> int:
+        return self.colecao.repetidas_bits
+
+    def adiciona_figurinha(self, figurinha: Figurinha) -> None:
+        '''
+        Adiciona uma figurinha na colecao. Se ja tiver essa figurinha,
+        apenas aumenta a quantidade.
+
+        Exemplos:
+        >>> Album = Colecao()
+        >>> neymar = Figurinha(4)
+        >>> Album.adiciona_figurinha(neymar)
+        >>> Album.adiciona_figurinha(neymar)
+        >>> ronaldo = Figurinha(20)
+        >>> Album.adiciona_figurinha(ronaldo)
+        >>> Album.gera_figurinhas_presentes()
+        '4, 20'
+        '''
+        self.adiciona_numero(figurinha.numero)
+
+    def adiciona_numero(self, numero: int) -> None:
+        self.colecao.adiciona_numero(numero)
+        self.ajusta()
+
+    def adiciona_lote(self, numeros: Iterable[int]) -> None:
+        self.colecao.adiciona_lote(numeros)
+        self.ajusta()
+
+    def remove_figurinha(self, figurinha: Figurinha) -> None:
+        '''
+        Remove uma figurinha da colecao. Se tiver mais de uma, so diminui
+        a quantidade. Se tiver apenas uma, remove completamente.
+        Se nao tiver a figurinha, nao faz nada.
+
+        Exemplos:
+        >>> copa = Colecao()
+        >>> fig1 = Figurinha(1)
+        >>> copa.adiciona_figurinha(fig1)
+        >>> copa.adiciona_figurinha(fig1)
+        >>> copa.remove_figurinha(fig1)
+        >>> copa.remove_figurinha(fig1)
+        >>> copa.gera_figurinhas_presentes()
+        ''
+        '''
+        self.remove_numero(figurinha.numero)
+
+    def remove_numero(self, numero: int) -> None:
+        self.colecao.remove_numero(numero)
+        self.ajusta()
+
+    def quantidade_de(self, numero: int) -> int:
+        return self.colecao.quantidade_de(numero)
+
+    def itera_quantidades(self) -> Iterator[tuple[int, int]]:
+        return self.colecao.itera_quantidades()
+
+    def gera_figurinhas_presentes(self) -> str:
+        '''
+        Retorna uma string com os numeros das figurinhas que tem na colecao.
+
+        Exemplos:
+        >>> copa = Colecao()
+        >>> copa.adiciona_figurinha(Figurinha(1))
+        >>> copa.adiciona_figurinha(Figurinha(3))
+        >>> copa.adiciona_figurinha(Figurinha(5))
+        >>> copa.gera_figurinhas_presentes()
+        '1, 3, 5'
+        >>> vazia = Colecao()
+        >>> vazia.gera_figurinhas_presentes()
+        ''
+        '''
+        return self.colecao.gera_figurinhas_presentes()
+
+    def gera_figurinhas_repetidas(self) -> str:
+        '''
+        Retorna uma string com as figurinhas repetidas, mostrando quantas
+        a mais cada uma tem.
+
+        Exemplos:
+        >>> copa = Colecao()
+        >>> fig1 = Figurinha(1)
+        >>> fig2 = Figurinha(2)
+        >>> copa.adiciona_figurinha(fig1)
+        >>> copa.adiciona_figurinha(fig1)
+        >>> copa.adiciona_figurinha(fig1)
+        >>> copa.adiciona_figurinha(fig2)
+        >>> copa.adiciona_figurinha(fig2)
+        >>> copa.gera_figurinhas_repetidas()
+        '1 (2), 2 (1)'
+        >>> vazia = Colecao()
+        >>> vazia.gera_figurinhas_repetidas()
+        ''
+        '''
+        return self.colecao.gera_figurinhas_repetidas()
+
+    def tamanho_do_album(self) -> int:
+        return self.colecao.tamanho_do_album()
+
+    def iter_faltantes(self) -> Iterator[int]:
+        return self.colecao.iter_faltantes()
+
+    def conta_faltantes(self) -> int:
+        return self.colecao.conta_faltantes()
+
+    def escreve_figurinhas_faltantes(self, saida: TextIO) -> None:
+        self.colecao.escreve_figurinhas_faltantes(saida)
+
+    def gera_figurinhas_faltantes(self) -> str:
+        return self.colecao.gera_figurinhas_faltantes()
+
+    def conta_figurinhas_trocaveis(self, colecao_destino: Colecao) -> int:
+        """
+        Conta quantas figurinhas repetidas eu tenho que a outra pessoa nao tem.
+        So da pra trocar se eu tiver repetida e o outro nao tiver nenhuma.
+
+        Exemplos:
+        >>> c1 = Colecao()
+        >>> c1.adiciona_figurinha(Figurinha(1))
+        >>> c1.adiciona_figurinha(Figurinha(1))
+        >>> c1.adiciona_figurinha(Figurinha(2))
+        >>> c1.adiciona_figurinha(Figurinha(2))
+        >>> c2 = Colecao()
+        >>> c2.adiciona_figurinha(Figurinha(1))
+        >>> c2.adiciona_figurinha(Figurinha(3))
+        >>> c1.conta_figurinhas_trocaveis(c2)
+        1
+        >>> c2.conta_figurinhas_trocaveis(c1)
+        0
+        """
+        return (self.repetidas_bits & ~colecao_destino.presentes_bits).bit_count()
+
+    def proximo_numero_trocavel(self, colecao_destino: Colecao, indice_inicial: int) -> int:
+        '''
+        O numero da proxima figurinha, a partir de *indice_inicial*, que eu
+        tenho repetida e o destino nao tem, ou -1. Nas duas representacoes
+        a posicao inicial eh um numero de figurinha.
+        '''
+        trocaveis = (self.repetidas_bits & ~colecao_destino.presentes_bits) >> indice_inicial
+
+        if trocaveis == 0:
+            return -1
+        return (trocaveis & -trocaveis).bit_length() - 1 + indice_inicial
+
+    def encontra_proxima_figurinha_trocavel(self, colecao_destino: Colecao, indice_inicial: int) -> Figurinha:
+        """
+        Procura a proxima figurinha que da pra trocar, comecando de um numero.
+        Retorna a primeira figurinha repetida que o outro nao tem.
+
+        Exemplos:
+        >>> c1 = Colecao()
+        >>> c1.adiciona_figurinha(Figurinha(2))
+        >>> c1.adiciona_figurinha(Figurinha(2))
+        >>> c1.adiciona_figurinha(Figurinha(5))
+        >>> c1.adiciona_figurinha(Figurinha(5))
+        >>> c2 = Colecao()
+        >>> c2.adiciona_figurinha(Figurinha(1))
+        >>> fig = c1.encontra_proxima_figurinha_trocavel(c2, 0)
+        >>> fig.numero
+        2
+        >>> fig2 = c1.encontra_proxima_figurinha_trocavel(c2, 3)
+        >>> fig2.numero
+        5
+        >>> fig3 = c1.encontra_proxima_figurinha_trocavel(c2, 6)
+        >>> fig3.numero
+        0
+        """
+        numero = self.proximo_numero_trocavel(colecao_destino, indice_inicial)
+
+        if numero == -1:
+            return Figurinha(0)
+        return Figurinha(numero)
+
+    def troca_maxima(self, colecao2: Colecao) -> None:
+        """
+        Faz a troca de figurinhas entre duas colecoes. Cada um da figurinhas
+        repetidas que tem e que o outro ainda nao tem. A troca so acontece
+        se os dois tiverem algo pra trocar (interesse mutuo). As trocas sao
+        feitas em ordem crescente de numero.
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> c.adiciona_figurinha(Figurinha(2))
+        >>> c.adiciona_figurinha(Figurinha(2))
+        >>> c.adiciona_figurinha(Figurinha(4))
+        >>> c.adiciona_figurinha(Figurinha(4))
+        >>> c.adiciona_figurinha(Figurinha(7))
+        >>> c.adiciona_figurinha(Figurinha(7))
+        >>> c.adiciona_figurinha(Figurinha(1))
+        >>> c.adiciona_figurinha(Figurinha(1))
+        >>> d = Colecao()
+        >>> d.adiciona_figurinha(Figurinha(2))
+        >>> d.adiciona_figurinha(Figurinha(6))
+        >>> d.adiciona_figurinha(Figurinha(6))
+        >>> d.adiciona_figurinha(Figurinha(8))
+        >>> d.adiciona_figurinha(Figurinha(8))
+        >>> d.adiciona_figurinha(Figurinha(10))
+        >>> d.adiciona_figurinha(Figurinha(10))
+        >>> c.troca_maxima(d)
+        >>> c.gera_figurinhas_presentes()
+        '1, 2, 4, 6, 7, 8, 10'
+        >>> c.gera_figurinhas_repetidas()
+        '2 (1)'
+        >>> d.gera_figurinhas_presentes()
+        '1, 2, 4, 6, 7, 8, 10'
+        >>> d.gera_figurinhas_repetidas()
+        ''
+        """
+        numero_de_trocas = min(self.conta_figurinhas_trocaveis(colecao2), colecao2.conta_figurinhas_trocaveis(self))
+
+        trocas_realizadas = 0
+        indice_col1 = 0
+        indice_col2 = 0
+        continuar = True
+
+        while trocas_realizadas < numero_de_trocas and continuar:
+            numero_para_col2 = self.proximo_numero_trocavel(colecao2, indice_col1)
+            trocaveis = (colecao2.repetidas_bits & ~self.presentes_bits) >> indice_col2
+            numero_para_col1 = -1
+            if trocaveis != 0:
+                numero_para_col1 = (trocaveis & -trocaveis).bit_length() - 1 + indice_col2
+
+            if numero_para_col2 != -1 and numero_para_col1 != -1:
+                self.remove_numero(numero_para_col2)
+                colecao2.adiciona_numero(numero_para_col2)
+
+                colecao2.remove_numero(numero_para_col1)
+                self.adiciona_numero(numero_para_col1)
+
+                trocas_realizadas += 1
+                indice_col1 = numero_para_col2 + 1
+                indice_col2 = numero_para_col1 + 1
+            else:
+                continuar = False
+
+    def gera_diff(self, outra: Colecao) -> list[tuple[int, int]]:
+        '''
+        Retorna o que mudou desta colecao para *outra*, como em
+        tad.Colecao.gera_diff, numa unica intercalacao das duas colecoes
+        (que podem estar em representacoes diferentes).
+
+        Exemplos:
+        >>> antes = Colecao(minimo_distintas=1)
+        >>> antes.adiciona_lote([1, 2, 2, 5])
+        >>> depois = Colecao()
+        >>> depois.adiciona_lote([2, 5, 5, 5, 400])
+        >>> antes.representacao(), depois.representacao()
+        ('densa', 'esparsa')
+        >>> antes.gera_diff(depois)
+        [(1, -1), (2, -1), (5, 2), (400, 1)]
+        '''
+        deltas = []
+        a = self.itera_quantidades()
+        b = outra.itera_quantidades()
+        item_a = next(a, None)
+        item_b = next(b, None)
+
+        while item_a is not None or item_b is not None:
+            if item_b is None or (item_a is not None and item_a[0] < item_b[0]):
+                deltas.append((item_a[0], -item_a[1]))
+                item_a = next(a, None)
+            elif item_a is None or item_b[0] < item_a[0]:
+                deltas.append(item_b)
+                item_b = next(b, None)
+            else:
+                if item_a[1] != item_b[1]:
+                    deltas.append((item_a[0], item_b[1] - item_a[1]))
+                item_a = next(a, None)
+                item_b = next(b, None)
+
+        return deltas
+
+    def aplica_diff(self, deltas: list[tuple[int, int]]) -> None:
+        self.colecao.aplica_diff(deltas)
+        self.ajusta()
+
+    def mescla(self, outra: Colecao, modo: str = 'soma') -> Colecao:
+        '''
+        Retorna uma colecao nova juntando esta com *outra*, como em
+        tad.Colecao.mescla. A nova colecao tem os mesmos limites desta.
+
+        Exemplos:
+        >>> a = Colecao()
+        >>> a.adiciona_lote([1, 1, 3])
+        >>> b = Colecao()
+        >>> b.adiciona_lote([1, 1, 1, 400])
+        >>> s = a.mescla(b)
+        >>> s.gera_figurinhas_presentes(), s.gera_figurinhas_repetidas()
+        ('1, 3, 400', '1 (4)')
+        >>> s.representacao()
+        'esparsa'
+        '''
+        if modo != 'uniao' and modo != 'maximo' and modo != 'soma':
+            raise ValueError("modo deve ser 'uniao', 'maximo' ou 'soma'")
+
+        quantidades = dict(self.itera_quantidades())
+        for numero, quantidade in outra.itera_quantidades():
+            atual = quantidades.get(numero, 0)
+            if modo == 'uniao':
+                quantidades[numero] = 1
+            elif modo == 'maximo':
+                quantidades[numero] = max(atual, quantidade)
+            else:
+                quantidades[numero] = atual + quantidade
+        if modo == 'uniao':
+            for numero in quantidades:
+                quantidades[numero] = 1
+
+        resultado = Colecao(self.limite_denso, self.limite_esparso, self.minimo_distintas)
+        resultado.aplica_diff(sorted(quantidades.items()))
+        return resultado
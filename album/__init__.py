@@ -0,0 +1,49 @@
+'''
+Colecoes de figurinhas com varias implementacoes (backends) e uma
+interface comum.
+
+    >>> import album
+    >>> c = album.nova_colecao('encadeada')
+    >>> c.adiciona_figurinha(album.Figurinha(7))
+    >>> isinstance(c, album.Colecao)
+    True
+
+Os nomes do pacote sao carregados so no primeiro uso (PEP 562), e cada
+backend so eh importado quando alguem pede por ele, entao importar o
+pacote nao carrega nenhuma implementacao:
+
+- Figurinha: a figurinha usada por todas as implementacoes;
+- Colecao, ColecaoComDiff: o protocolo que todas seguem;
+- registra, disponiveis, backend, nova_colecao: o registro de backends;
+- troca_maxima, converte, numeros_dos_bits: operacoes entre colecoes de
+  backends quaisquer.
+'''
+from __future__ import annotations
+import importlib
+
+NOMES = {
+    'Figurinha': 'album.figurinha',
+    'Colecao': 'album.protocolo',
+    'ColecaoComDiff': 'album.protocolo',
+    'registra': 'album.registro',
+    'disponiveis': 'album.registro',
+    'backend': 'album.registro',
+    'nova_colecao': 'album.registro',
+    'troca_maxima': 'album.trocas',
+    'converte': 'album.trocas',
+    'numeros_dos_bits': 'album.trocas',
+}
+
+__all__ = sorted(NOMES)
+
+
+def __getattr__(nome: str):
+    if nome not in NOMES:
+        raise AttributeError("module 'album' has no attribute " + repr(nome))
+    valor = getattr(importlib.import_module(NOMES[nome]), nome)
+    globals()[nome] = valor
+    return valor
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + list(NOMES))
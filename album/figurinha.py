@@ -0,0 +1,25 @@
+from __future__ import annotations
+from dataclasses import dataclass
+
+
+@dataclass
+class Figurinha:
+    '''
+    Uma figurinha tem um numero e uma quantidade.
+    Por padrão, quando criamos uma figurinha nova, ela tem quantidade 1.
+
+    Todas as implementacoes de Colecao usam esta mesma classe, entao uma
+    Figurinha tirada de uma colecao pode ser adicionada em qualquer outra.
+
+    Exemplos:
+    >>> messi = Figurinha(1)
+    >>> messi
+    Figurinha(numero=1, quantidade=1)
+    >>> neymar = Figurinha(10)
+    >>> neymar.numero
+    10
+    >>> neymar.quantidade
+    1
+    '''
+    numero: int
+    quantidade: int = 1
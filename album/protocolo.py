@@ -0,0 +1,70 @@
+from __future__ import annotations
+from typing import Iterable, Iterator, Protocol, runtime_checkable
+from album.figurinha import Figurinha
+
+
+@runtime_checkable
+class Colecao(Protocol):
+    '''
+    O que toda implementacao de colecao de figurinhas oferece (tad.Colecao,
+    tad_encad.Colecao, tad_intervalos.Colecao, adaptativa.Colecao e
+    acervo.VisaoColecao). Codigo que so usa estes metodos, como indices,
+    recomendacoes ou simulacoes, funciona com qualquer uma delas.
+
+    Os bits sao a lingua comum entre implementacoes diferentes: em
+    *presentes_bits* o bit n esta ligado se a colecao tem a figurinha n, e
+    em *repetidas_bits* se tem a figurinha n repetida.
+
+    Exemplos:
+    >>> import tad, tad_encad
+    >>> isinstance(tad.Colecao(), Colecao), isinstance(tad_encad.Colecao(), Colecao)
+    (True, True)
+    >>> isinstance(Figurinha(1), Colecao)
+    False
+    '''
+
+    @property
+    def presentes_bits(self) -> int: ...
+
+    @property
+    def repetidas_bits(self) -> int: ...
+
+    def adiciona_figurinha(self, figurinha: Figurinha) -> None: ...
+
+    def adiciona_numero(self, numero: int) -> None: ...
+
+    def adiciona_lote(self, numeros: Iterable[int]) -> None: ...
+
+    def remove_figurinha(self, figurinha: Figurinha) -> None: ...
+
+    def remove_numero(self, numero: int) -> None: ...
+
+    def quantidade_de(self, numero: int) -> int: ...
+
+    def itera_quantidades(self) -> Iterator[tuple[int, int]]: ...
+
+    def gera_figurinhas_presentes(self) -> str: ...
+
+    def gera_figurinhas_repetidas(self) -> str: ...
+
+    def tamanho_do_album(self) -> int: ...
+
+    def iter_faltantes(self) -> Iterator[int]: ...
+
+    def conta_faltantes(self) -> int: ...
+
+    def gera_figurinhas_faltantes(self) -> str: ...
+
+    def conta_figurinhas_trocaveis(self, colecao_destino: Colecao) -> int: ...
+
+    def troca_maxima(self, colecao2: Colecao) -> None: ...
+
+
+@runtime_checkable
+class ColecaoComDiff(Colecao, Protocol):
+    '''
+    Uma Colecao que tambem aplica uma lista de (numero, delta) de uma vez.
+    Todas as implementacoes do registro (album.registro) sao assim.
+    '''
+
+    def aplica_diff(self, deltas: list[tuple[int, int]]) -> None: ...
@@ -0,0 +1,93 @@
+from __future__ import annotations
+import importlib
+from album.protocolo import ColecaoComDiff
+
+
+# nome -> (modulo, classe). Os modulos so sao importados quando o backend
+# eh usado pela primeira vez.
+BACKENDS: dict[str, tuple[str, str]] = {
+    'array': ('tad', 'Colecao'),
+    'encadeada': ('tad_encad', 'Colecao'),
+    'intervalos': ('tad_intervalos', 'Colecao'),
+    'adaptativa': ('adaptativa', 'Colecao'),
+}
+
+carregados: dict[str, type] = {}
+
+
+def registra(nome: str, modulo: str, classe: str = 'Colecao') -> None:
+    '''
+    Registra (ou substitui) o backend *nome*: a classe *classe* do modulo
+    *modulo*. O modulo nao eh importado agora, so no primeiro uso.
+
+    Exemplos:
+    >>> registra('minha', 'tad')
+    >>> 'minha' in disponiveis()
+    True
+    >>> del BACKENDS['minha']
+    '''
+    BACKENDS[nome] = (modulo, classe)
+    carregados.pop(nome, None)
+
+
+def disponiveis() -> list[str]:
+    '''
+    Os nomes dos backends registrados, em ordem alfabetica.
+
+    Exemplos:
+    >>> disponiveis()
+    ['adaptativa', 'array', 'encadeada', 'intervalos']
+    '''
+    return sorted(BACKENDS)
+
+
+def backend(nome: str) -> type:
+    '''
+    A classe de colecao do backend *nome*, importando o modulo dele se for
+    a primeira vez.
+
+    Exemplos:
+    >>> registra('teste', 'tad_intervalos')
+    >>> 'teste' in carregados
+    False
+    >>> backend('teste').__module__
+    'tad_intervalos'
+    >>> 'teste' in carregados
+    True
+    >>> del BACKENDS['teste'], carregados['teste']
+    >>> backend('arvore')
+    Traceback (most recent call last):
+    ...
+    ValueError: backend desconhecido: arvore (disponiveis: adaptativa, array, encadeada, intervalos)
+    '''
+    if nome not in carregados:
+        if nome not in BACKENDS:
+            raise ValueError('backend desconhecido: ' + nome + ' (disponiveis: ' + ', '.join(disponiveis()) + ')')
+        modulo, classe = BACKENDS[nome]
+        carregados[nome] = getattr(importlib.import_module(modulo), classe)
+    return carregados[nome]
+
+
+def nova_colecao(nome: str = 'array', *args, **kwargs) -> ColecaoComDiff:
+    '''
+    Cria uma colecao vazia do backend *nome*. Os outros argumentos vao para
+    o construtor da classe (por exemplo, o catalogo de tad.Colecao).
+
+    Exemplos:
+    >>> c = nova_colecao('encadeada')
+    >>> c.adiciona_lote([3, 1, 3])
+    >>> c.gera_figurinhas_repetidas()
+    '3 (1)'
+    >>> type(c).__module__
+    'tad_encad'
+
+    So o modulo do backend pedido eh importado (num interpretador novo,
+    para nao depender do que ja foi importado aqui):
+
+    >>> import os, subprocess, sys
+    >>> codigo = "import sys, album; album.nova_colecao('intervalos'); print('tad' in sys.modules)"
+    >>> raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    >>> subprocess.run([sys.executable, '-c', codigo], cwd=raiz, capture_output=True, text=True).stdout.strip()
+    'False'
+    '''
+    return backend(nome)(*args, **kwargs)
@@ -0,0 +1,81 @@
+from __future__ import annotations
+from album.protocolo import Colecao, ColecaoComDiff
+from album.registro import nova_colecao
+
+
+def numeros_dos_bits(bits: int) -> list[int]:
+    '''
+    Os numeros dos bits ligados de *bits*, em ordem crescente.
+
+    Exemplos:
+    >>> numeros_dos_bits(0b101010)
+    [1, 3, 5]
+    '''
+    numeros = []
+    while bits != 0:
+        menor_bit = bits & -bits
+        numeros.append(menor_bit.bit_length() - 1)
+        bits = bits ^ menor_bit
+    return numeros
+
+
+def converte(colecao: Colecao, nome: str, *args, **kwargs) -> ColecaoComDiff:
+    '''
+    Uma copia de *colecao* no backend *nome* (ver album.registro).
+
+    Exemplos:
+    >>> c = nova_colecao('array')
+    >>> c.adiciona_lote([2, 2, 9])
+    >>> e = converte(c, 'intervalos')
+    >>> type(e).__module__, e.gera_figurinhas_repetidas()
+    ('tad_intervalos', '2 (1)')
+    '''
+    nova = nova_colecao(nome, *args, **kwargs)
+    nova.aplica_diff(list(colecao.itera_quantidades()))
+    return nova
+
+
+def troca_maxima(colecao1: Colecao, colecao2: Colecao) -> None:
+    '''
+    A troca maxima entre duas colecoes de quaisquer backends: a menor
+    figurinha repetida de uma que falta na outra vai em troca da menor
+    repetida da outra que falta na primeira, e assim por diante, como em
+    tad.Colecao.troca_maxima.
+
+    Se as duas forem da mesma classe, usa o troca_maxima dela (que pode
+    ter um caminho mais rapido, como a lista encadeada). Se forem de
+    classes diferentes, as figurinhas trocadas saem direto dos bits das
+    duas e sao movidas com remove_numero e adiciona_numero, sem converter
+    nenhuma das colecoes.
+
+    Exemplos:
+    >>> lote1 = [2, 2, 4, 4, 7, 7, 1, 1]
+    >>> lote2 = [2, 6, 6, 8, 8, 10, 10]
+    >>> a, b = nova_colecao('array'), nova_colecao('array')
+    >>> a.adiciona_lote(lote1)
+    >>> b.adiciona_lote(lote2)
+    >>> troca_maxima(a, b)
+    >>> c, d = nova_colecao('encadeada'), nova_colecao('intervalos')
+    >>> c.adiciona_lote(lote1)
+    >>> d.adiciona_lote(lote2)
+    >>> troca_maxima(c, d)
+    >>> c.gera_figurinhas_presentes(), d.gera_figurinhas_presentes()
+    ('1, 2, 4, 6, 7, 8, 10', '1, 2, 4, 6, 7, 8, 10')
+    >>> list(c.itera_quantidades()) == list(a.itera_quantidades())
+    True
+    >>> list(d.itera_quantidades()) == list(b.itera_quantidades())
+    True
+    '''
+    if type(colecao1) is type(colecao2):
+        colecao1.troca_maxima(colecao2)
+        return
+
+    para_col2 = numeros_dos_bits(colecao1.repetidas_bits & ~colecao2.presentes_bits)
+    para_col1 = numeros_dos_bits(colecao2.repetidas_bits & ~colecao1.presentes_bits)
+
+    for numero_para_col2, numero_para_col1 in zip(para_col2, para_col1):
+        colecao1.remove_numero(numero_para_col2)
+        colecao2.adiciona_numero(numero_para_col2)
+
+        colecao2.remove_numero(numero_para_col1)
+        colecao1.adiciona_numero(numero_para_col1)
@@ -0,0 +1,351 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Iterable
+from tad import Colecao, Figurinha
+
+
+@dataclass
+class Ciclo:
+    '''
+    Uma troca em ciclo entre varias colecoes. O participante
+    *participantes[i]* da as figurinhas *figurinhas[i]* para o participante
+    seguinte (o ultimo da para o primeiro). Todos dao e recebem o mesmo
+    numero de figurinhas.
+
+    Os participantes sao as posicoes das colecoes na lista passada para
+    encontra_ciclos.
+
+    Exemplos:
+    >>> c = Ciclo([0, 2, 1], [[7, 8], [3, 4], [9, 12]])
+    >>> c.transferencias()
+    [(0, 2, 7), (0, 2, 8), (2, 1, 3), (2, 1, 4), (1, 0, 9), (1, 0, 12)]
+    '''
+    participantes: list[int]
+    figurinhas: list[list[int]]
+
+    def transferencias(self) -> list[tuple[int, int, int]]:
+        '''
+        Retorna as transferencias do ciclo como (origem, destino, numero),
+        uma por figurinha.
+        '''
+        resultado = []
+        for i in range(len(self.participantes)):
+            origem = self.participantes[i]
+            destino = self.participantes[(i + 1) % len(self.participantes)]
+            for numero in self.figurinhas[i]:
+                resultado.append((origem, destino, numero))
+        return resultado
+
+
+def menores_numeros(bits: int, quantidade: int) -> list[int]:
+    '''
+    Os *quantidade* menores numeros ligados em *bits*.
+
+    Exemplos:
+    >>> menores_numeros(0b1011010, 3)
+    [1, 3, 4]
+    '''
+    numeros = []
+    while bits != 0 and len(numeros) < quantidade:
+        menor_bit = bits & -bits
+        numeros.append(menor_bit.bit_length() - 1)
+        bits = bits ^ menor_bit
+    return numeros
+
+
+class GrafoDeTrocas:
+    '''
+    O grafo "pode dar uma repetida que falta" entre colecoes: existe uma
+    aresta de u para v se u tem repetida alguma figurinha que v nao tem
+    (a mesma regra de conta_figurinhas_trocaveis).
+
+    As arestas nao sao guardadas uma a uma. Para cada figurinha o grafo
+    guarda dois conjuntos de usuarios (como bits de um int): quem tem ela
+    repetida e quem tem ela. Os vizinhos de um usuario sao calculados
+    com OR desses conjuntos, so quando sao pedidos, e ficam guardados.
+
+    Quando colecoes mudam, atualiza corrige so os conjuntos das figurinhas
+    que mudaram nelas, sem montar o grafo de novo.
+
+    Exemplos:
+    >>> a, b, c = Colecao(), Colecao(), Colecao()
+    >>> for n in [1, 1, 2]:
+    ...     a.adiciona_figurinha(Figurinha(n))
+    >>> for n in [2, 2, 3]:
+    ...     b.adiciona_figurinha(Figurinha(n))
+    >>> for n in [3, 3, 1]:
+    ...     c.adiciona_figurinha(Figurinha(n))
+    >>> g = GrafoDeTrocas([a, b, c])
+    >>> g.sucessores(0), g.sucessores(1), g.sucessores(2)
+    (2, 4, 1)
+    >>> g.figurinha_para(0, 1)
+    1
+    '''
+    colecoes: list[Colecao]
+    com_repetida: dict[int, int]
+    com_figurinha: dict[int, int]
+    todas_repetidas: int
+    todos: int
+    repetidas: list[int]
+    presentes: list[int]
+
+    def __init__(self, colecoes: list[Colecao]):
+        self.colecoes = colecoes
+        self.com_repetida = {}
+        self.com_figurinha = {}
+        self.todas_repetidas = 0
+        self.todos = (1 << len(colecoes)) - 1
+        self.repetidas = [0] * len(colecoes)
+        self.presentes = [0] * len(colecoes)
+        self.cache_sucessores: dict[int, int] = {}
+        self.cache_antecessores: dict[int, int] = {}
+        self.atualiza(range(len(colecoes)))
+
+    def atualiza(self, usuarios: Iterable[int]) -> None:
+        '''
+        Corrige o grafo depois que as colecoes de *usuarios* mudaram. So as
+        figurinhas que mudaram em cada colecao sao mexidas.
+
+        Exemplos:
+        >>> a, b = Colecao(), Colecao()
+        >>> a.adiciona_lote([1, 1, 2])
+        >>> b.adiciona_lote([2, 2])
+        >>> g = GrafoDeTrocas([a, b])
+        >>> g.sucessores(0), g.sucessores(1)
+        (2, 0)
+        >>> a.remove_numero(2)
+        >>> g.atualiza([0])
+        >>> g.sucessores(0), g.sucessores(1)
+        (2, 1)
+        '''
+        for u in usuarios:
+            colecao = self.colecoes[u]
+            mudou = colecao.repetidas_bits ^ self.repetidas[u]
+            self.repetidas[u] = colecao.repetidas_bits
+            while mudou != 0:
+                menor_bit = mudou & -mudou
+                numero = menor_bit.bit_length() - 1
+                usuarios_com = self.com_repetida.get(numero, 0) ^ (1 << u)
+                if usuarios_com == 0:
+                    del self.com_repetida[numero]
+                    self.todas_repetidas = self.todas_repetidas & ~menor_bit
+                else:
+                    self.com_repetida[numero] = usuarios_com
+                    self.todas_repetidas = self.todas_repetidas | menor_bit
+                mudou = mudou ^ menor_bit
+
+            mudou = colecao.presentes_bits ^ self.presentes[u]
+            self.presentes[u] = colecao.presentes_bits
+            while mudou != 0:
+                menor_bit = mudou & -mudou
+                numero = menor_bit.bit_length() - 1
+                self.com_figurinha[numero] = self.com_figurinha.get(numero, 0) ^ (1 << u)
+                mudou = mudou ^ menor_bit
+
+        # Uma figurinha que mudou muda os vizinhos de muita gente.
+        self.cache_sucessores.clear()
+        self.cache_antecessores.clear()
+
+    def sucessores(self, u: int) -> int:
+        '''
+        Os usuarios para quem *u* pode dar alguma figurinha, como bits.
+        '''
+        if u not in self.cache_sucessores:
+            vizinhos = 0
+            bits = self.repetidas[u]
+            while bits != 0:
+                menor_bit = bits & -bits
+                vizinhos = vizinhos | (self.todos & ~self.com_figurinha[menor_bit.bit_length() - 1])
+                bits = bits ^ menor_bit
+            self.cache_sucessores[u] = vizinhos
+        return self.cache_sucessores[u]
+
+    def antecessores(self, u: int) -> int:
+        '''
+        Os usuarios que podem dar alguma figurinha para *u*, como bits.
+        '''
+        if u not in self.cache_antecessores:
+            vizinhos = 0
+            bits = self.todas_repetidas & ~self.presentes[u]
+            while bits != 0:
+                menor_bit = bits & -bits
+                vizinhos = vizinhos | self.com_repetida[menor_bit.bit_length() - 1]
+                bits = bits ^ menor_bit
+            self.cache_antecessores[u] = vizinhos
+        return self.cache_antecessores[u]
+
+    def figurinha_para(self, origem: int, destino: int) -> int:
+        '''
+        A menor figurinha que *origem* pode dar para *destino*, ou -1.
+        '''
+        bits = self.trocaveis(origem, destino)
+        if bits == 0:
+            return -1
+        return (bits & -bits).bit_length() - 1
+
+    def trocaveis(self, origem: int, destino: int) -> int:
+        '''
+        Todas as figurinhas que *origem* pode dar para *destino*, como bits.
+        '''
+        return self.repetidas[origem] & ~self.presentes[destino]
+
+
+def encontra_ciclos(colecoes: list[Colecao], k: int = 3, limite_busca: int = 10000) -> list[Ciclo]:
+    '''
+    Encontra ciclos de troca disjuntos (cada colecao aparece em no maximo
+    um ciclo) com ate *k* participantes. Os ciclos mais curtos sao
+    procurados primeiro. Cada ciclo passa o maximo de figurinhas que da:
+    se o participante que menos pode dar para o seguinte pode dar m
+    figurinhas, todos dao as m menores que podem. As colecoes nao sao
+    alteradas.
+
+    A busca a partir de cada usuario eh uma busca em profundidade limitada
+    a *k* passos, que so segue usuarios ainda livres, e no ultimo passo
+    so aceita quem pode dar para o usuario inicial. Cada busca expande no
+    maximo *limite_busca* usuarios, entao ciclos podem deixar de ser
+    encontrados em grafos muito grandes e esparsos.
+
+    Exemplos:
+    >>> a, b, c = Colecao(), Colecao(), Colecao()
+    >>> for n in [1, 1, 2]:
+    ...     a.adiciona_figurinha(Figurinha(n))
+    >>> for n in [2, 2, 3]:
+    ...     b.adiciona_figurinha(Figurinha(n))
+    >>> for n in [3, 3, 1]:
+    ...     c.adiciona_figurinha(Figurinha(n))
+    >>> a.conta_figurinhas_trocaveis(b), b.conta_figurinhas_trocaveis(a)
+    (1, 0)
+    >>> encontra_ciclos([a, b, c])
+    [Ciclo(participantes=[0, 1, 2], figurinhas=[[1], [2], [3]])]
+    >>> encontra_ciclos([a, b, c], k=2)
+    []
+    >>> a, b, c = Colecao(), Colecao(), Colecao()
+    >>> a.adiciona_lote([1, 1, 4, 4, 2, 5])
+    >>> b.adiciona_lote([2, 2, 5, 5, 3, 6])
+    >>> c.adiciona_lote([3, 3, 6, 6, 1, 4])
+    >>> encontra_ciclos([a, b, c])
+    [Ciclo(participantes=[0, 1, 2], figurinhas=[[1, 4], [2, 5], [3, 6]])]
+    '''
+    return ciclos_do_grafo(GrafoDeTrocas(colecoes), k, limite_busca)
+
+
+def ciclos_do_grafo(grafo: GrafoDeTrocas, k: int, limite_busca: int) -> list[Ciclo]:
+    '''
+    O mesmo que encontra_ciclos, usando um grafo ja montado.
+    '''
+    livres = 0
+    for u in range(len(grafo.colecoes)):
+        if grafo.repetidas[u] != 0:
+            livres = livres | (1 << u)
+
+    ciclos = []
+    for comprimento in range(2, k + 1):
+        for u in range(len(grafo.colecoes)):
+            if (livres >> u) & 1 == 1:
+                caminho = busca_ciclo(grafo, u, comprimento, livres, limite_busca)
+                if caminho is not None:
+                    arestas = []
+                    for i in range(len(caminho)):
+                        destino = caminho[(i + 1) % len(caminho)]
+                        arestas.append(grafo.trocaveis(caminho[i], destino))
+                        livres = livres & ~(1 << caminho[i])
+                    quantidade = min(bits.bit_count() for bits in arestas)
+                    ciclos.append(Ciclo(caminho, [menores_numeros(bits, quantidade) for bits in arestas]))
+    return ciclos
+
+
+def busca_ciclo(grafo: GrafoDeTrocas, inicio: int, comprimento: int, livres: int, limite_busca: int) -> list[int] | None:
+    '''
+    Procura um ciclo com exatamente *comprimento* usuarios que comeca e
+    termina em *inicio*, usando apenas usuarios em *livres*. Retorna os
+    usuarios do ciclo ou None.
+    '''
+    chegam_no_inicio = grafo.antecessores(inicio) & livres & ~(1 << inicio)
+    if chegam_no_inicio == 0:
+        return None
+
+    caminho = [inicio]
+    usados = 1 << inicio
+    # Cada item da pilha sao os candidatos que ainda faltam testar no nivel.
+    # No ultimo nivel so servem candidatos que podem dar para o inicio.
+    pilha = [grafo.sucessores(inicio) & livres & ~usados]
+    if comprimento == 2:
+        pilha[0] = pilha[0] & chegam_no_inicio
+    expansoes = 0
+
+    while len(pilha) > 0 and expansoes < limite_busca:
+        candidatos = pilha[-1]
+
+        if len(caminho) == comprimento - 1 and candidatos != 0:
+            return caminho + [(candidatos & -candidatos).bit_length() - 1]
+
+        if candidatos == 0 or len(caminho) == comprimento - 1:
+            pilha.pop()
+            usados = usados & ~(1 << caminho.pop())
+            continue
+
+        menor_bit = candidatos & -candidatos
+        pilha[-1] = candidatos ^ menor_bit
+        proximo = menor_bit.bit_length() - 1
+        expansoes = expansoes + 1
+
+        caminho.append(proximo)
+        usados = usados | menor_bit
+        seguintes = grafo.sucessores(proximo) & livres & ~usados
+        if len(caminho) == comprimento - 1:
+            seguintes = seguintes & chegam_no_inicio
+        pilha.append(seguintes)
+
+    return None
+
+
+def aplica_ciclos(colecoes: list[Colecao], ciclos: list[Ciclo]) -> None:
+    '''
+    Faz as trocas dos ciclos com remove_numero e adiciona_numero.
+    '''
+    for ciclo in ciclos:
+        for origem, destino, numero in ciclo.transferencias():
+            colecoes[origem].remove_numero(numero)
+            colecoes[destino].adiciona_numero(numero)
+
+
+def troca_em_ciclos(colecoes: list[Colecao], k: int = 3, max_rodadas: int | None = None,
+                    limite_busca: int = 10000) -> list[Ciclo]:
+    '''
+    Encontra e aplica ciclos de troca em rodadas, ate nao haver mais
+    ciclos (ou ate *max_rodadas*). Retorna todos os ciclos aplicados.
+    O grafo eh montado uma vez so e, depois de cada rodada, so os
+    participantes dos ciclos sao atualizados nele.
+
+    Exemplos:
+    >>> a, b, c = Colecao(), Colecao(), Colecao()
+    >>> for n in [1, 1, 2]:
+    ...     a.adiciona_figurinha(Figurinha(n))
+    >>> for n in [2, 2, 3]:
+    ...     b.adiciona_figurinha(Figurinha(n))
+    >>> for n in [3, 3, 1]:
+    ...     c.adiciona_figurinha(Figurinha(n))
+    >>> a.troca_maxima(b)
+    >>> a.gera_figurinhas_presentes()
+    '1, 2'
+    >>> troca_em_ciclos([a, b, c])
+    [Ciclo(participantes=[0, 1, 2], figurinhas=[[1], [2], [3]])]
+    >>> a.gera_figurinhas_presentes(), a.gera_figurinhas_repetidas()
+    ('1, 2, 3', '')
+    >>> c.gera_figurinhas_presentes(), c.gera_figurinhas_repetidas()
+    ('1, 2, 3', '')
+    '''
+    grafo = GrafoDeTrocas(colecoes)
+    aplicados: list[Ciclo] = []
+    rodada = 0
+
+    while max_rodadas is None or rodada < max_rodadas:
+        ciclos = ciclos_do_grafo(grafo, k, limite_busca)
+        if len(ciclos) == 0:
+            break
+        aplica_ciclos(colecoes, ciclos)
+        grafo.atualiza(u for ciclo in ciclos for u in ciclo.participantes)
+        aplicados.extend(ciclos)
+        rodada = rodada + 1
+
+    return aplicados
@@ -1,7 +1,178 @@
-from typing import TypeVar, Iterator, Generic, overload, Tuple
+from __future__ import annotations
+from array import array as vetor
+from dataclasses import dataclass, fields, is_dataclass
+from typing import Iterable, TypeVar, Iterator, Generic, overload, Tuple
+import struct
+import sys
 
 T = TypeVar('T')
 
+PONTEIRO = struct.calcsize('P')
+
+
+@dataclass
+class Pegada:
+    '''
+    Quantos bytes uma estrutura ocupa, separados por categoria:
+
+    - container: os objetos da propria estrutura (o objeto, a lista ou
+      o bloco de memoria e as posicoes usadas dela);
+    - nos: os nos de uma lista encadeada;
+    - payload: os valores guardados (as figurinhas, por exemplo);
+    - capacidade_ociosa: espaco reservado que nao guarda nada (posicoes
+      depois do ultimo valor usado, sobras de redimensiona).
+
+    Exemplos
+    >>> p = Pegada(100, 0, 50, 10) + Pegada(container=20)
+    >>> p
+    Pegada(container=120, nos=0, payload=50, capacidade_ociosa=10)
+    >>> p.total()
+    180
+    >>> print(p.formata())
+    container                120 bytes ( 66.7%)
+    nos                        0 bytes (  0.0%)
+    payload                   50 bytes ( 27.8%)
+    capacidade_ociosa         10 bytes (  5.6%)
+    total                    180 bytes
+    '''
+    container: int = 0
+    nos: int = 0
+    payload: int = 0
+    capacidade_ociosa: int = 0
+
+    def total(self) -> int:
+        return self.container + self.nos + self.payload + self.capacidade_ociosa
+
+    def __add__(self, outra: Pegada) -> Pegada:
+        return Pegada(self.container + outra.container, self.nos + outra.nos,
+                      self.payload + outra.payload, self.capacidade_ociosa + outra.capacidade_ociosa)
+
+    def formata(self) -> str:
+        total = self.total()
+        linhas = []
+        for campo in fields(self):
+            valor = getattr(self, campo.name)
+            percentual = 100 * valor / total if total > 0 else 0.0
+            linhas.append(format(campo.name, '18') + format(valor, '10') + ' bytes (' + format(percentual, '5.1f') + '%)')
+        linhas.append(format('total', '18') + format(total, '10') + ' bytes')
+        return '\n'.join(linhas)
+
+
+def conta_uma_vez(obj: object, visitados: set[int]) -> bool:
+    '''
+    Marca *obj* como visitado. Retorna False se ele ja tinha sido contado.
+    '''
+    if id(obj) in visitados:
+        return False
+    visitados.add(id(obj))
+    return True
+
+
+def tamanho_do_objeto(obj: object) -> int:
+    '''
+    O tamanho de *obj* sem os objetos que ele referencia: sys.getsizeof
+    mais (aproximadamente) o espaco das referencias para os atributos.
+
+    O __dict__ nao eh consultado de proposito: desde o Python 3.11 os
+    atributos ficam num vetor separado e pedir o __dict__ criaria um
+    dicionario que nao existia, aumentando a memoria que queremos medir.
+    Para saber se o objeto tem atributos assim olhamos __dictoffset__ do
+    tipo (0 quando nao tem __dict__, como em classes so com __slots__).
+    Nao basta procurar __slots__ no tipo: typing.Generic define
+    __slots__ = () e toda classe generica o herda.
+
+    Exemplos
+    >>> class SoSlots:
+    ...     __slots__ = ('x',)
+    >>> tamanho_do_objeto(SoSlots()) == sys.getsizeof(SoSlots())
+    True
+    >>> a = array(3, 0)
+    >>> tamanho_do_objeto(a) > sys.getsizeof(a)
+    True
+    '''
+    tamanho = sys.getsizeof(obj)
+    if type(obj).__dictoffset__ == 0:
+        return tamanho
+    if is_dataclass(obj):
+        atributos = len(fields(obj))
+    else:
+        atributos = sum(len(getattr(classe, '__annotations__', {})) for classe in type(obj).__mro__)
+    return tamanho + PONTEIRO * (atributos + 2)
+
+
+def tamanho_profundo(obj: object, visitados: set[int]) -> int:
+    '''
+    O tamanho de *obj* e de tudo que ele referencia (os campos de uma
+    dataclass, os itens de listas e tuplas), sem contar de novo objetos
+    que ja estao em *visitados*.
+
+    Exemplos
+    >>> from dataclasses import dataclass
+    >>> @dataclass
+    ... class Ponto:
+    ...     x: int
+    ...     y: int
+    >>> p = Ponto(1000, 2000)
+    >>> visitados = set()
+    >>> tamanho_profundo([p, p], visitados) == sys.getsizeof([p, p]) + tamanho_profundo(p, set())
+    True
+    >>> tamanho_profundo(p, visitados)
+    0
+    '''
+    if not conta_uma_vez(obj, visitados):
+        return 0
+
+    tamanho = tamanho_do_objeto(obj)
+    if isinstance(obj, (list, tuple)):
+        for item in obj:
+            tamanho = tamanho + tamanho_profundo(item, visitados)
+    elif is_dataclass(obj) and not isinstance(obj, type):
+        for campo in fields(obj):
+            tamanho = tamanho + tamanho_profundo(getattr(obj, campo.name), visitados)
+    return tamanho
+
+
+def pegada_de_lista(lista: list, usados: int, visitados: set[int]) -> Pegada:
+    '''
+    A pegada de uma lista usada como bloco de posicoes: as *usados*
+    primeiras posicoes sao container e os valores delas sao payload; as
+    outras posicoes (e os valores so referenciados por elas), alem da
+    sobra que a lista reservou, sao capacidade ociosa.
+    '''
+    pegada = Pegada()
+    if not conta_uma_vez(lista, visitados):
+        return pegada
+
+    usados = min(usados, len(lista))
+    pegada.container = sys.getsizeof([]) + PONTEIRO * usados
+    pegada.capacidade_ociosa = sys.getsizeof(lista) - pegada.container
+    for i in range(usados):
+        pegada.payload = pegada.payload + tamanho_profundo(lista[i], visitados)
+    for i in range(usados, len(lista)):
+        pegada.capacidade_ociosa = pegada.capacidade_ociosa + tamanho_profundo(lista[i], visitados)
+    return pegada
+
+
+def relatorio_memoria(estruturas: Iterable) -> Pegada:
+    '''
+    A soma das pegadas (metodo footprint) de varias estruturas, por
+    exemplo os albuns de todos os usuarios. Os objetos compartilhados
+    entre elas sao contados uma vez so.
+
+    Exemplos
+    >>> a = array(100, 'x' * 1000)
+    >>> b = array(100, a[0])
+    >>> sozinhos = a.footprint().total() + b.footprint().total()
+    >>> juntos = relatorio_memoria([a, b]).total()
+    >>> sozinhos - juntos == sys.getsizeof(a[0])
+    True
+    '''
+    visitados: set[int] = set()
+    pegada = Pegada()
+    for estrutura in estruturas:
+        pegada = pegada + estrutura.footprint(visitados)
+    return pegada
+
 
 class array(Generic[T]):
     '''
@@ -104,6 +275,33 @@ class array(Generic[T]):
     def __repr__(self) -> str:
         return 'array(' + repr(self.valores) + ')'
 
+    def footprint(self, visitados: set[int] | None = None, usados: int | None = None) -> Pegada:
+        '''
+        Quantos bytes o arranjo ocupa (ver Pegada). Se *usados* for dado,
+        so as primeiras *usados* posicoes contam como usadas; as outras sao
+        capacidade ociosa. Objetos em *visitados* nao sao contados de novo.
+
+        Exemplos
+        >>> a = array(10, 'x' * 100)
+        >>> p = a.footprint()
+        >>> p.payload == sys.getsizeof('x' * 100)
+        True
+        >>> q = a.footprint(usados=4)
+        >>> q.capacidade_ociosa == 6 * PONTEIRO
+        True
+        >>> p.total() == q.total()
+        True
+        '''
+        if visitados is None:
+            visitados = set()
+        if usados is None:
+            usados = len(self.valores)
+        if not conta_uma_vez(self, visitados):
+            return Pegada()
+        pegada = pegada_de_lista(self.valores, usados, visitados)
+        pegada.container = pegada.container + tamanho_do_objeto(self)
+        return pegada
+
     def __str__(self) -> str:
         return 'array(' + str(self.valores) + ')'
 
@@ -159,4 +357,135 @@ class array2d(Generic[T]):
         return s + '])'
 
     def __str__(self) -> str:
-        return repr(self)
\ No newline at end of file
+        return repr(self)
+
+    def footprint(self, visitados: set[int] | None = None) -> Pegada:
+        '''
+        Quantos bytes o arranjo ocupa (ver Pegada).
+
+        Exemplos
+        >>> a = array2d(3, 4, 0.5)
+        >>> p = a.footprint()
+        >>> p.payload == sys.getsizeof(0.5)
+        True
+        >>> p.capacidade_ociosa
+        0
+        '''
+        if visitados is None:
+            visitados = set()
+        if not conta_uma_vez(self, visitados):
+            return Pegada()
+        pegada = pegada_de_lista(self.valores, self.lins * self.cols, visitados)
+        pegada.container = pegada.container + tamanho_do_objeto(self)
+        return pegada
+
+
+class array2d_tipado(array2d[int]):
+    '''
+    Um arranjo 2d de inteiros guardado num unico bloco contiguo de memoria
+    (um array.array do Python com o tipo *tipo*, por padrao 'H', inteiros
+    sem sinal de 2 bytes), em vez de uma lista de objetos.
+
+    As linhas podem ser acrescentadas com adiciona_linhas. A memoria eh
+    reservada em blocos de *bloco* linhas, entao acrescentar uma linha
+    quase nunca move os valores.
+
+    Exemplos
+    >>> a = array2d_tipado(2, 3, 0)
+    >>> a[1, 2] = 7
+    >>> a
+    array2d_tipado([[0, 0, 0]
+                    [0, 0, 7]])
+    >>> a.adiciona_linhas(1)
+    2
+    >>> a[2, 0] = 5
+    >>> a.linha(2)
+    array('H', [5, 0, 0])
+    >>> a.coluna(2)
+    array('H', [0, 7, 0])
+    >>> a[1, 2] = -1
+    Traceback (most recent call last):
+    ...
+    OverflowError: unsigned short is less than minimum
+    '''
+    valores: vetor
+    capacidade: int
+    bloco: int
+    val: int
+
+    def __init__(self, lins: int, cols: int, val: int, tipo: str = 'H', bloco: int = 64):
+        self.lins = lins
+        self.cols = cols
+        self.val = val
+        self.bloco = bloco
+        self.capacidade = lins
+        self.valores = vetor(tipo, [val]) * (lins * cols)
+
+    def adiciona_linhas(self, n: int) -> int:
+        '''
+        Acrescenta *n* linhas (com o valor inicial) no fim do arranjo e
+        retorna o indice da primeira linha nova.
+        '''
+        primeira = self.lins
+
+        if self.lins + n > self.capacidade:
+            blocos = (self.lins + n - self.capacidade + self.bloco - 1) // self.bloco
+            novas = blocos * self.bloco
+            self.valores.extend(vetor(self.valores.typecode, [self.val]) * (novas * self.cols))
+            self.capacidade = self.capacidade + novas
+
+        self.lins = self.lins + n
+        return primeira
+
+    def linha(self, lin: int) -> vetor:
+        '''
+        Uma copia da linha *lin* (uma fatia contigua do bloco).
+        '''
+        assert lin < self.lins
+        i = lin * self.cols
+        return self.valores[i:(i + self.cols)]
+
+    def coluna(self, col: int) -> vetor:
+        '''
+        Uma copia da coluna *col*, um valor por linha.
+        '''
+        assert col < self.cols
+        return self.valores[col:(self.lins * self.cols):self.cols]
+
+    def __repr__(self) -> str:
+        s = 'array2d_tipado(['
+        sep = ''
+        for lin in range(self.lins):
+            i = lin * self.cols
+            s += sep + repr(list(self.valores[i:(i + self.cols)]))
+            sep = '\n' + ' ' * 16
+        return s + '])'
+
+    def footprint(self, visitados: set[int] | None = None) -> Pegada:
+        '''
+        Quantos bytes o arranjo ocupa (ver Pegada). Os valores estao no
+        proprio bloco, entao o payload eh so o espaco das linhas usadas; as
+        linhas reservadas e ainda nao usadas sao capacidade ociosa.
+
+        Exemplos
+        >>> a = array2d_tipado(1, 10, 0, 'H', bloco=64)
+        >>> a.adiciona_linhas(1)
+        1
+        >>> p = a.footprint()
+        >>> p.payload
+        40
+        >>> p.capacidade_ociosa >= 63 * 10 * 2
+        True
+        '''
+        if visitados is None:
+            visitados = set()
+        if not conta_uma_vez(self, visitados):
+            return Pegada()
+        pegada = Pegada()
+        pegada.container = tamanho_do_objeto(self)
+        if conta_uma_vez(self.valores, visitados):
+            cabecalho = sys.getsizeof(vetor(self.valores.typecode))
+            pegada.container = pegada.container + cabecalho
+            pegada.payload = self.valores.itemsize * self.lins * self.cols
+            pegada.capacidade_ociosa = sys.getsizeof(self.valores) - cabecalho - pegada.payload
+        return pegada
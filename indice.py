@@ -0,0 +1,101 @@
+from __future__ import annotations
+from tad import Colecao, Figurinha
+
+
+class IndiceDeRepetidas:
+    '''
+    Um indice que guarda, para cada numero de figurinha, quem tem ela
+    repetida. Com ele, a pergunta "quem pode me dar o que me falta?"
+    percorre apenas as figurinhas do album, e nao todos os parceiros.
+
+    O indice eh uma foto das colecoes no momento em que foram
+    registradas. Se uma colecao mudar, basta registra-la de novo.
+
+    Funciona com qualquer colecao que tenha *presentes_bits* e
+    *repetidas_bits* (a de array e a encadeada).
+
+    Exemplos:
+    >>> ana = Colecao()
+    >>> for n in [1, 2, 2, 5, 5]:
+    ...     ana.adiciona_figurinha(Figurinha(n))
+    >>> bia = Colecao()
+    >>> for n in [2, 3, 3, 4, 4]:
+    ...     bia.adiciona_figurinha(Figurinha(n))
+    >>> eu = Colecao()
+    >>> for n in [1, 4]:
+    ...     eu.adiciona_figurinha(Figurinha(n))
+    >>> indice = IndiceDeRepetidas()
+    >>> indice.registra('ana', ana)
+    >>> indice.registra('bia', bia)
+    >>> indice.quem_pode_dar(eu)
+    {'ana': [2, 5], 'bia': [3]}
+    >>> indice.quem_tem_repetida(4)
+    ['bia']
+    >>> indice.remove('ana')
+    >>> indice.quem_pode_dar(eu)
+    {'bia': [3]}
+    '''
+    donos: dict[int, set[str]]
+    repetidas: dict[str, int]
+
+    def __init__(self):
+        self.donos = {}
+        self.repetidas = {}
+
+    def registra(self, nome: str, colecao: Colecao) -> None:
+        '''
+        Coloca (ou atualiza) as figurinhas repetidas de *colecao* no indice.
+        '''
+        if nome in self.repetidas:
+            self.remove(nome)
+
+        bits = colecao.repetidas_bits
+        self.repetidas[nome] = bits
+
+        while bits != 0:
+            menor_bit = bits & -bits
+            numero = menor_bit.bit_length() - 1
+            if numero not in self.donos:
+                self.donos[numero] = set()
+            self.donos[numero].add(nome)
+            bits = bits ^ menor_bit
+
+    def remove(self, nome: str) -> None:
+        '''
+        Tira do indice as figurinhas de *nome*. Se nao estiver no indice,
+        nao faz nada.
+        '''
+        bits = self.repetidas.pop(nome, 0)
+
+        while bits != 0:
+            menor_bit = bits & -bits
+            numero = menor_bit.bit_length() - 1
+            self.donos[numero].discard(nome)
+            if len(self.donos[numero]) == 0:
+                del self.donos[numero]
+            bits = bits ^ menor_bit
+
+    def quem_tem_repetida(self, numero: int) -> list[str]:
+        '''
+        Retorna, em ordem alfabetica, quem tem a figurinha *numero* repetida.
+        '''
+        return sorted(self.donos.get(numero, ()))
+
+    def quem_pode_dar(self, colecao: Colecao, ignorar: str | None = None) -> dict[str, list[int]]:
+        '''
+        Para cada parceiro que tem repetida alguma figurinha que falta em
+        *colecao*, retorna os numeros (em ordem crescente) que ele pode dar.
+        O parceiro *ignorar* (normalmente o proprio dono da colecao) fica
+        de fora. O resultado vem ordenado pelo nome do parceiro.
+        '''
+        resultado: dict[str, list[int]] = {}
+
+        for numero in sorted(self.donos):
+            if (colecao.presentes_bits >> numero) & 1 == 0:
+                for nome in self.donos[numero]:
+                    if nome != ignorar:
+                        if nome not in resultado:
+                            resultado[nome] = []
+                        resultado[nome].append(numero)
+
+        return dict(sorted(resultado.items()))
@@ -0,0 +1,505 @@
+'''
+Reproduz um log de eventos em JSONL (um evento por linha) sobre as colecoes
+dos usuarios e escreve o estado final.
+
+Eventos:
+    {"tipo": "adiciona", "usuario": "ana", "figurinhas": [1, 2, 2]}
+    {"tipo": "remove", "usuario": "ana", "figurinhas": [2]}
+    {"tipo": "troca", "usuario": "ana", "outro": "bia", "da": [2], "recebe": [5]}
+    {"tipo": "troca", "usuario": "ana", "outro": "bia"}
+
+Uma troca com "da" e "recebe" eh reproduzida como foi registrada; sem eles,
+vira uma troca_maxima entre os dois. Qualquer evento pode ter um "grupo",
+usado para dividir os usuarios entre processos (ver --processos).
+
+Uso:
+    python reproduz_eventos.py eventos.jsonl --album 670 > relatorio.txt
+    zcat eventos.jsonl.gz | python reproduz_eventos.py - --processos 4 --formato snapshot
+'''
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing
+import queue
+import sys
+import time
+import zlib
+from typing import Iterable, Iterator, TextIO
+from tad import Catalogo, Colecao
+
+
+TIPOS = ('adiciona', 'remove', 'troca')
+
+
+def le_eventos(linhas: Iterable[str]) -> Iterator[tuple[int, dict]]:
+    '''
+    Le os eventos de *linhas* um por vez, junto com o numero da linha.
+    Linhas em branco sao ignoradas; eventos mal formados dao ValueError.
+
+    Exemplos:
+    >>> list(le_eventos(['{"tipo": "adiciona", "usuario": "ana", "figurinhas": [1]}', '']))
+    [(1, {'tipo': 'adiciona', 'usuario': 'ana', 'figurinhas': [1]})]
+    >>> list(le_eventos(['{"tipo": "compra", "usuario": "ana"}']))
+    Traceback (most recent call last):
+    ...
+    ValueError: linha 1: tipo de evento desconhecido: compra
+    >>> list(le_eventos(['{"tipo": "troca", "usuario": "ana"}']))
+    Traceback (most recent call last):
+    ...
+    ValueError: linha 1: troca sem "outro"
+    >>> list(le_eventos(['{"tipo": "adiciona", "usuario": "ana", "figurinhas": ["x"]}']))
+    Traceback (most recent call last):
+    ...
+    ValueError: linha 1: "figurinhas" deve ser uma lista de numeros maiores que 0
+    >>> list(le_eventos(['{"tipo": "remove", "usuario": 7, "figurinhas": []}']))
+    Traceback (most recent call last):
+    ...
+    ValueError: linha 1: "usuario" deve ser um texto
+    '''
+    for numero_linha, linha in enumerate(linhas, 1):
+        if linha.strip() == '':
+            continue
+        try:
+            evento = json.loads(linha)
+        except json.JSONDecodeError as erro:
+            raise ValueError('linha ' + str(numero_linha) + ': json invalido: ' + str(erro)) from None
+
+        if not isinstance(evento, dict) or 'usuario' not in evento:
+            raise ValueError('linha ' + str(numero_linha) + ': evento sem "usuario"')
+        if evento.get('tipo') not in TIPOS:
+            raise ValueError('linha ' + str(numero_linha) + ': tipo de evento desconhecido: ' + str(evento.get('tipo')))
+        if evento['tipo'] == 'troca':
+            if 'outro' not in evento:
+                raise ValueError('linha ' + str(numero_linha) + ': troca sem "outro"')
+            textos = ['usuario', 'outro']
+            listas = [campo for campo in ('da', 'recebe') if campo in evento]
+        else:
+            if 'figurinhas' not in evento:
+                raise ValueError('linha ' + str(numero_linha) + ': ' + evento['tipo'] + ' sem "figurinhas"')
+            textos = ['usuario']
+            listas = ['figurinhas']
+
+        for campo in textos:
+            if not isinstance(evento[campo], str):
+                raise ValueError('linha ' + str(numero_linha) + ': "' + campo + '" deve ser um texto')
+        for campo in listas:
+            if not lista_de_numeros(evento[campo]):
+                raise ValueError('linha ' + str(numero_linha) + ': "' + campo
+                                 + '" deve ser uma lista de numeros maiores que 0')
+
+        yield (numero_linha, evento)
+
+
+def lista_de_numeros(valor: object) -> bool:
+    '''
+    Se *valor* eh uma lista de numeros de figurinha (inteiros maiores que 0).
+
+    Exemplos:
+    >>> lista_de_numeros([1, 2]), lista_de_numeros([0]), lista_de_numeros([True]), lista_de_numeros(3)
+    (True, False, False, False)
+    '''
+    if not isinstance(valor, list):
+        return False
+    for numero in valor:
+        if type(numero) is not int or numero < 1:
+            return False
+    return True
+
+
+class Reprodutor:
+    '''
+    Aplica eventos sobre as colecoes dos usuarios, juntando as adicoes de
+    cada usuario num lote que vai de uma vez so por adiciona_lote.
+
+    O lote de um usuario eh aplicado antes de qualquer remocao ou troca
+    que envolva esse usuario, entao o resultado eh o mesmo de aplicar os
+    eventos um por um. Quando os lotes de todos os usuarios passam de
+    *limite_lote* figurinhas, todos sao aplicados, o que limita a memoria
+    usada com os lotes.
+
+    Numa troca com "da" e "recebe", cada um precisa ter as figurinhas que
+    da; se nao tiver, a troca inteira da ValueError e nada muda.
+
+    Exemplos:
+    >>> r = Reprodutor(Catalogo(10))
+    >>> r.aplica({'tipo': 'adiciona', 'usuario': 'ana', 'figurinhas': [1, 1, 2, 7, 7]})
+    >>> r.aplica({'tipo': 'adiciona', 'usuario': 'bia', 'figurinhas': [3, 3, 4]})
+    >>> r.aplica({'tipo': 'remove', 'usuario': 'bia', 'figurinhas': [4, 5]})
+    >>> r.aplica({'tipo': 'troca', 'usuario': 'ana', 'outro': 'bia'})
+    >>> r.aplica({'tipo': 'adiciona', 'usuario': 'ana', 'figurinhas': [9]})
+    >>> r.aplica({'tipo': 'troca', 'usuario': 'bia', 'outro': 'caio', 'da': [3], 'recebe': []})
+    >>> r.aplica({'tipo': 'troca', 'usuario': 'caio', 'outro': 'ana', 'da': [3], 'recebe': [2, 2]})
+    Traceback (most recent call last):
+    ...
+    ValueError: troca: ana nao tem 2 figurinhas 2 para dar
+    >>> r.descarrega()
+    >>> escreve_relatorio(r.colecoes, sys.stdout)
+    ana: presentes 1, 2, 3, 7, 9 | repetidas 7 (1) | faltantes 5
+    bia: presentes 1 | repetidas  | faltantes 9
+    caio: presentes 3 | repetidas  | faltantes 9
+    '''
+    catalogo: Catalogo | None
+    limite_lote: int
+    colecoes: dict[str, Colecao]
+    pendentes: dict[str, list[int]]
+    total_pendente: int
+
+    def __init__(self, catalogo: Catalogo | None = None, limite_lote: int = 100000):
+        self.catalogo = catalogo
+        self.limite_lote = limite_lote
+        self.colecoes = {}
+        self.pendentes = {}
+        self.total_pendente = 0
+
+    def colecao(self, usuario: str) -> Colecao:
+        if usuario not in self.colecoes:
+            self.colecoes[usuario] = Colecao(self.catalogo)
+        return self.colecoes[usuario]
+
+    def descarrega(self, usuario: str | None = None) -> None:
+        '''
+        Aplica o lote pendente de *usuario*, ou de todos se for None.
+        '''
+        if usuario is None:
+            for nome, numeros in self.pendentes.items():
+                self.colecao(nome).adiciona_lote(numeros)
+            self.pendentes = {}
+            self.total_pendente = 0
+        elif usuario in self.pendentes:
+            numeros = self.pendentes.pop(usuario)
+            self.colecao(usuario).adiciona_lote(numeros)
+            self.total_pendente = self.total_pendente - len(numeros)
+
+    def aplica(self, evento: dict) -> None:
+        usuario = evento['usuario']
+
+        if evento['tipo'] == 'adiciona':
+            self.pendentes.setdefault(usuario, []).extend(evento['figurinhas'])
+            self.total_pendente = self.total_pendente + len(evento['figurinhas'])
+            if self.total_pendente > self.limite_lote:
+                self.descarrega()
+
+        elif evento['tipo'] == 'remove':
+            self.descarrega(usuario)
+            colecao = self.colecao(usuario)
+            for numero in evento['figurinhas']:
+                colecao.remove_numero(numero)
+
+        else:
+            outro = evento['outro']
+            self.descarrega(usuario)
+            self.descarrega(outro)
+            colecao1 = self.colecao(usuario)
+            colecao2 = self.colecao(outro)
+
+            if 'da' in evento or 'recebe' in evento:
+                confere_quem_da(usuario, colecao1, evento.get('da', []))
+                confere_quem_da(outro, colecao2, evento.get('recebe', []))
+                for numero in evento.get('da', []):
+                    colecao1.remove_numero(numero)
+                    colecao2.adiciona_numero(numero)
+                for numero in evento.get('recebe', []):
+                    colecao2.remove_numero(numero)
+                    colecao1.adiciona_numero(numero)
+            else:
+                colecao1.troca_maxima(colecao2)
+
+
+def confere_quem_da(usuario: str, colecao: Colecao, numeros: list[int]) -> None:
+    '''
+    Da ValueError se *colecao* nao tem todas as figurinhas de *numeros*
+    (contando as repetidas da lista).
+    '''
+    precisa: dict[int, int] = {}
+    for numero in numeros:
+        precisa[numero] = precisa.get(numero, 0) + 1
+    for numero, quantidade in precisa.items():
+        if colecao.quantidade_de(numero) < quantidade:
+            if quantidade == 1:
+                raise ValueError('troca: ' + usuario + ' nao tem a figurinha ' + str(numero) + ' para dar')
+            raise ValueError('troca: ' + usuario + ' nao tem ' + str(quantidade) + ' figurinhas '
+                             + str(numero) + ' para dar')
+
+
+def escreve_relatorio(colecoes: dict[str, Colecao], saida: TextIO) -> None:
+    '''
+    Uma linha por usuario, em ordem de nome, com as figurinhas presentes,
+    as repetidas e (se houver catalogo) quantas faltam.
+    '''
+    for usuario in sorted(colecoes):
+        colecao = colecoes[usuario]
+        linha = (usuario + ': presentes ' + colecao.gera_figurinhas_presentes()
+                 + ' | repetidas ' + colecao.gera_figurinhas_repetidas())
+        if colecao.catalogo is not None:
+            linha = linha + ' | faltantes ' + str(colecao.conta_faltantes())
+        saida.write(linha + '\n')
+
+
+def escreve_snapshot(colecoes: dict[str, Colecao], saida: TextIO) -> None:
+    '''
+    Um objeto JSON por usuario, em ordem de nome, com os pares
+    (numero, quantidade) da colecao.
+
+    Exemplos:
+    >>> c = Colecao()
+    >>> c.adiciona_lote([4, 4, 1])
+    >>> escreve_snapshot({'ana': c}, sys.stdout)
+    {"usuario": "ana", "quantidades": [[1, 1], [4, 2]]}
+    '''
+    for usuario in sorted(colecoes):
+        quantidades = [[numero, quantidade] for numero, quantidade in colecoes[usuario].itera_quantidades()]
+        saida.write(json.dumps({'usuario': usuario, 'quantidades': quantidades}) + '\n')
+
+
+class Progresso:
+    '''
+    Escreve em *saida* quantos eventos ja foram processados e a vazao, a
+    cada *intervalo* eventos e no fim.
+    '''
+    saida: TextIO
+    intervalo: int
+    eventos: int
+    proximo: int
+    inicio: float
+
+    def __init__(self, saida: TextIO, intervalo: int):
+        self.saida = saida
+        self.intervalo = intervalo
+        self.eventos = 0
+        self.proximo = intervalo
+        self.inicio = time.perf_counter()
+
+    def conta(self) -> None:
+        self.eventos = self.eventos + 1
+        if self.intervalo > 0 and self.eventos >= self.proximo:
+            self.proximo = self.proximo + self.intervalo
+            self.escreve('')
+
+    def escreve(self, prefixo: str) -> None:
+        decorrido = time.perf_counter() - self.inicio
+        vazao = self.eventos / decorrido if decorrido > 0 else 0.0
+        self.saida.write(prefixo + str(self.eventos) + ' eventos, ' + format(decorrido, '.1f')
+                         + ' s, ' + format(vazao, '.0f') + ' eventos/s\n')
+        self.saida.flush()
+
+
+def trabalhador(fila, resultados, tamanho_album: int | None, limite_lote: int) -> None:
+    '''
+    Processo de uma fatia dos usuarios: aplica os pedacos de eventos (pares
+    (numero da linha, evento)) que chegam por *fila* ate receber None e
+    devolve ('ok', colecoes) por *resultados*. Se um evento der qualquer
+    erro, continua esvaziando a fila (para o processo principal nao
+    travar) e devolve ('erro', mensagem) no lugar.
+    '''
+    catalogo = Catalogo(tamanho_album) if tamanho_album is not None else None
+    reprodutor = Reprodutor(catalogo, limite_lote)
+    erro = None
+    pedaco = fila.get()
+    while pedaco is not None:
+        if erro is None:
+            numero_linha = 0
+            try:
+                for numero_linha, evento in pedaco:
+                    reprodutor.aplica(evento)
+            except Exception as e:
+                erro = 'linha ' + str(numero_linha) + ': ' + str(e)
+        pedaco = fila.get()
+
+    if erro is None:
+        try:
+            reprodutor.descarrega()
+        except Exception as e:
+            erro = str(e)
+
+    if erro is not None:
+        resultados.put(('erro', erro))
+    else:
+        resultados.put(('ok', reprodutor.colecoes))
+
+
+def confere_trabalhadores(trabalhadores: list) -> None:
+    '''
+    Da ValueError se algum processo de trabalho morreu sem terminar direito.
+    '''
+    for processo in trabalhadores:
+        if not processo.is_alive() and processo.exitcode not in (None, 0):
+            raise ValueError('um processo de trabalho terminou com codigo ' + str(processo.exitcode))
+
+
+def envia(fila, item, trabalhadores: list, espera: float = 1.0) -> None:
+    '''
+    Coloca *item* na *fila*, sem travar para sempre se o processo que le
+    dela tiver morrido.
+    '''
+    while True:
+        try:
+            fila.put(item, timeout=espera)
+            return
+        except queue.Full:
+            confere_trabalhadores(trabalhadores)
+
+
+def fatia_do_evento(numero_linha: int, evento: dict, fatias: dict[str, int], processos: int) -> int:
+    '''
+    Em qual processo o evento vai ser aplicado. Cada usuario fica sempre no
+    mesmo processo: o do seu grupo, se o evento tiver "grupo", ou o do
+    proprio nome. Uma troca entre usuarios de processos diferentes eh um
+    erro.
+
+    Exemplos:
+    >>> fatias = {}
+    >>> fatia_do_evento(1, {'usuario': 'ana', 'grupo': 'g1'}, fatias, 4)
+    1
+    >>> fatia_do_evento(2, {'usuario': 'ana', 'outro': 'bia', 'grupo': 'g1'}, fatias, 4)
+    1
+    >>> fatia_do_evento(3, {'usuario': 'ana', 'outro': 'caio'}, fatias, 4)
+    Traceback (most recent call last):
+    ...
+    ValueError: linha 3: troca entre ana e caio, que estao em processos diferentes (use "grupo")
+    '''
+    chave = evento.get('grupo', evento['usuario'])
+    fatia = zlib.crc32(str(chave).encode()) % processos
+
+    for usuario in (evento['usuario'], evento.get('outro')):
+        if usuario is None:
+            continue
+        if fatias.setdefault(usuario, fatia) != fatia:
+            if 'outro' in evento:
+                raise ValueError('linha ' + str(numero_linha) + ': troca entre ' + evento['usuario'] + ' e '
+                                 + evento['outro'] + ', que estao em processos diferentes (use "grupo")')
+            raise ValueError('linha ' + str(numero_linha) + ': usuario ' + usuario + ' mudou de grupo')
+    return fatia
+
+
+def reproduz(entrada: Iterable[str], catalogo: Catalogo | None = None, processos: int = 1,
+             limite_lote: int = 100000, progresso: Progresso | None = None,
+             tamanho_pedaco: int = 1000) -> dict[str, Colecao]:
+    '''
+    Reproduz todos os eventos de *entrada* e retorna as colecoes finais.
+
+    Com *processos* > 1 os usuarios sao divididos entre processos (ver
+    fatia_do_evento). O processo principal le a entrada e manda os eventos
+    em pedacos de *tamanho_pedaco* por filas de tamanho limitado, entao a
+    memoria nao cresce com o tamanho do log.
+
+    Exemplos:
+    >>> log = ['{"tipo": "adiciona", "usuario": "ana", "figurinhas": [1, 1, 2]}',
+    ...        '{"tipo": "adiciona", "usuario": "bia", "figurinhas": [3, 3]}',
+    ...        '{"tipo": "troca", "usuario": "ana", "outro": "bia"}']
+    >>> escreve_snapshot(reproduz(log), sys.stdout)
+    {"usuario": "ana", "quantidades": [[1, 1], [2, 1], [3, 1]]}
+    {"usuario": "bia", "quantidades": [[1, 1], [3, 1]]}
+    >>> reproduz(log + ['{"tipo": "troca", "usuario": "ana", "outro": "bia", "da": [9]}'])
+    Traceback (most recent call last):
+    ...
+    ValueError: linha 4: troca: ana nao tem a figurinha 9 para dar
+    '''
+    if processos <= 1:
+        reprodutor = Reprodutor(catalogo, limite_lote)
+        for numero_linha, evento in le_eventos(entrada):
+            try:
+                reprodutor.aplica(evento)
+            except ValueError as erro:
+                raise ValueError('linha ' + str(numero_linha) + ': ' + str(erro)) from None
+            if progresso is not None:
+                progresso.conta()
+        reprodutor.descarrega()
+        return reprodutor.colecoes
+
+    tamanho_album = catalogo.tamanho if catalogo is not None else None
+    filas = [multiprocessing.Queue(maxsize=4) for _ in range(processos)]
+    resultados = multiprocessing.Queue()
+    trabalhadores = [multiprocessing.Process(target=trabalhador, args=(fila, resultados, tamanho_album, limite_lote))
+                     for fila in filas]
+    for processo in trabalhadores:
+        processo.start()
+
+    try:
+        fatias: dict[str, int] = {}
+        pedacos: list[list[tuple[int, dict]]] = [[] for _ in range(processos)]
+        for numero_linha, evento in le_eventos(entrada):
+            fatia = fatia_do_evento(numero_linha, evento, fatias, processos)
+            pedacos[fatia].append((numero_linha, evento))
+            if len(pedacos[fatia]) >= tamanho_pedaco:
+                envia(filas[fatia], pedacos[fatia], trabalhadores)
+                pedacos[fatia] = []
+            if progresso is not None:
+                progresso.conta()
+
+        for fatia in range(processos):
+            if len(pedacos[fatia]) > 0:
+                envia(filas[fatia], pedacos[fatia], trabalhadores)
+            envia(filas[fatia], None, trabalhadores)
+
+        colecoes: dict[str, Colecao] = {}
+        erro = None
+        recebidos = 0
+        while recebidos < processos:
+            try:
+                situacao, resultado = resultados.get(timeout=1.0)
+            except queue.Empty:
+                confere_trabalhadores(trabalhadores)
+                continue
+            recebidos = recebidos + 1
+            if situacao == 'erro':
+                erro = resultado
+            else:
+                colecoes.update(resultado)
+        for processo in trabalhadores:
+            processo.join()
+        if erro is not None:
+            raise ValueError(erro)
+        return colecoes
+    except BaseException:
+        # sem isso, a saida do programa espera as filas mandarem o que
+        # sobrou para processos que ja morreram
+        for fila in filas:
+            fila.cancel_join_thread()
+        raise
+    finally:
+        for processo in trabalhadores:
+            if processo.is_alive():
+                processo.terminate()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Reproduz um log JSONL de eventos de figurinhas.')
+    parser.add_argument('entrada', help='arquivo JSONL de eventos, ou - para ler da entrada padrao')
+    parser.add_argument('--album', type=int, default=None, help='tamanho do album (sem ele, o album nao tem limite)')
+    parser.add_argument('--processos', type=int, default=1, help='quantos processos usar para aplicar os eventos')
+    parser.add_argument('--formato', choices=['relatorio', 'snapshot'], default='relatorio')
+    parser.add_argument('--saida', default='-', help='arquivo de saida, ou - para a saida padrao')
+    parser.add_argument('--limite-lote', type=int, default=100000,
+                        help='quantas adicoes guardar em lotes antes de aplicar todas')
+    parser.add_argument('--intervalo', type=int, default=100000,
+                        help='a cada quantos eventos mostrar o progresso (0 desliga)')
+    args = parser.parse_args(argv)
+
+    catalogo = Catalogo(args.album) if args.album is not None else None
+    progresso = Progresso(sys.stderr, args.intervalo)
+
+    entrada = sys.stdin if args.entrada == '-' else open(args.entrada, encoding='utf-8')
+    try:
+        colecoes = reproduz(entrada, catalogo, args.processos, args.limite_lote, progresso)
+    except ValueError as erro:
+        sys.stderr.write('erro: ' + str(erro) + '\n')
+        return 1
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+    progresso.escreve('fim: ')
+
+    saida = sys.stdout if args.saida == '-' else open(args.saida, 'w', encoding='utf-8')
+    try:
+        if args.formato == 'relatorio':
+            escreve_relatorio(colecoes, saida)
+        else:
+            escreve_snapshot(colecoes, saida)
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
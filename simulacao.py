@@ -0,0 +1,273 @@
+from __future__ import annotations
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import accumulate
+import math
+import os
+import random
+from tad import Catalogo, Colecao
+
+TENTATIVAS_POR_BLOCO = 1000
+
+
+@dataclass
+class Configuracao:
+    '''
+    Os parametros de uma simulacao de abertura de pacotes.
+
+    As figurinhas de um pacote sao sorteadas de forma independente (um
+    pacote pode ter figurinhas iguais). Sem *pesos* todas tem a mesma
+    chance; com *pesos*, pesos[i] eh o peso da figurinha i + 1.
+
+    Com *usuarios* maior que 1, cada usuario abre um pacote por rodada e,
+    se *trocas* for True, depois de cada rodada cada usuario faz
+    troca_maxima com o seguinte (o ultimo com o primeiro).
+
+    Exemplos:
+    >>> Configuracao(10, 5, pesos=[1.0] * 9)
+    Traceback (most recent call last):
+    ...
+    ValueError: pesos deve ter um valor para cada figurinha
+    >>> Configuracao(2, 5, pesos=[1.0, 0.0])
+    Traceback (most recent call last):
+    ...
+    ValueError: todas as figurinhas precisam ter peso positivo
+    '''
+    tamanho_album: int = 670
+    figurinhas_por_pacote: int = 5
+    pesos: list[float] | None = None
+    usuarios: int = 1
+    trocas: bool = False
+
+    def __post_init__(self) -> None:
+        if self.pesos is not None and len(self.pesos) != self.tamanho_album:
+            raise ValueError('pesos deve ter um valor para cada figurinha')
+        if self.pesos is not None and min(self.pesos) <= 0:
+            raise ValueError('todas as figurinhas precisam ter peso positivo')
+        if self.usuarios < 1:
+            raise ValueError('precisa de pelo menos um usuario')
+
+    def pesos_acumulados(self) -> list[float] | None:
+        if self.pesos is None:
+            return None
+        return list(accumulate(self.pesos))
+
+
+@dataclass
+class Resultado:
+    '''
+    O numero esperado de pacotes (por usuario) para completar o album,
+    com o intervalo de confianca de 95% da media.
+    '''
+    tentativas: int
+    media: float
+    desvio: float
+    minimo: float
+    maximo: float
+
+    def intervalo(self) -> tuple[float, float]:
+        margem = 1.96 * self.desvio / math.sqrt(self.tentativas)
+        return (self.media - margem, self.media + margem)
+
+
+def gera_pacote(rng: random.Random, config: Configuracao, acumulados: list[float] | None = None) -> list[int]:
+    '''
+    Sorteia os numeros das figurinhas de um pacote.
+
+    Exemplos:
+    >>> rng = random.Random(1)
+    >>> pacote = gera_pacote(rng, Configuracao(10, 5))
+    >>> len(pacote), all(1 <= n <= 10 for n in pacote)
+    (5, True)
+    >>> config = Configuracao(3, 4, pesos=[1e-9, 1e-9, 1.0])
+    >>> gera_pacote(rng, config, config.pesos_acumulados())
+    [3, 3, 3, 3]
+    '''
+    if acumulados is None:
+        return [rng.randint(1, config.tamanho_album) for _ in range(config.figurinhas_por_pacote)]
+    return rng.choices(range(1, config.tamanho_album + 1), cum_weights=acumulados, k=config.figurinhas_por_pacote)
+
+
+def pacotes_sozinho_uniforme(rng: random.Random, config: Configuracao) -> int:
+    '''
+    Pacotes que um usuario sozinho abre ate completar um album com todas
+    as figurinhas igualmente provaveis.
+
+    Nao sorteia figurinha por figurinha: quando o usuario ja tem j
+    figurinhas distintas, o numero de sorteios ate aparecer uma nova
+    segue uma distribuicao geometrica com p = (n - j) / n, que eh
+    sorteada direto. Sao n sorteios por tentativa, e nao ~n log n.
+    '''
+    sorteios = config.tamanho_album
+    log = math.log
+    aleatorio = rng.random
+    for inverso in inversos_geometricos(config.tamanho_album):
+        sorteios = sorteios + int(log(1.0 - aleatorio()) * inverso)
+    return -(-sorteios // config.figurinhas_por_pacote)
+
+
+@lru_cache(maxsize=None)
+def inversos_geometricos(n: int) -> tuple[float, ...]:
+    '''
+    Os valores 1 / log(1 - p) para p = (n - j) / n, j de 1 ate n - 1,
+    usados para sortear as geometricas em pacotes_sozinho_uniforme
+    (para j = 0 a primeira figurinha eh sempre nova).
+    '''
+    return tuple(1.0 / math.log1p(-(n - j) / n) for j in range(1, n))
+
+
+def pacotes_sozinho(rng: random.Random, config: Configuracao, acumulados: list[float]) -> int:
+    '''
+    Pacotes que um usuario sozinho abre ate completar um album com pesos.
+    As contagens ficam num bytearray (so interessa se ja tem ou nao),
+    sem criar objetos por figurinha.
+    '''
+    n = config.tamanho_album
+    total = acumulados[-1]
+    tem = bytearray(n + 1)
+    distintas = 0
+    pacotes = 0
+    por_pacote = config.figurinhas_por_pacote
+    aleatorio = rng.random
+
+    while distintas < n:
+        pacotes = pacotes + 1
+        for _ in range(por_pacote):
+            num = bisect_right(acumulados, aleatorio() * total, 0, n - 1) + 1
+            if tem[num] == 0:
+                tem[num] = 1
+                distintas = distintas + 1
+    return pacotes
+
+
+def pacotes_com_trocas(rng: random.Random, config: Configuracao, acumulados: list[float] | None) -> float:
+    '''
+    Simula um grupo de usuarios abrindo pacotes (com adiciona_lote) e,
+    se configurado, trocando com troca_maxima depois de cada rodada.
+    Retorna a media de pacotes que cada usuario abriu ate completar.
+    '''
+    catalogo = Catalogo(config.tamanho_album)
+    colecoes = [Colecao(catalogo) for _ in range(config.usuarios)]
+    pacotes = [0] * config.usuarios
+    completos = [False] * config.usuarios
+    faltam = config.usuarios
+
+    while faltam > 0:
+        for u in range(config.usuarios):
+            if not completos[u]:
+                colecoes[u].adiciona_lote(gera_pacote(rng, config, acumulados))
+                pacotes[u] = pacotes[u] + 1
+
+        if config.trocas and config.usuarios > 1:
+            for u in range(config.usuarios):
+                colecoes[u].troca_maxima(colecoes[(u + 1) % config.usuarios])
+
+        for u in range(config.usuarios):
+            if not completos[u] and colecoes[u].conta_faltantes() == 0:
+                completos[u] = True
+                faltam = faltam - 1
+
+    return sum(pacotes) / config.usuarios
+
+
+def tentativa(rng: random.Random, config: Configuracao, acumulados: list[float] | None) -> float:
+    '''
+    Uma tentativa da simulacao, escolhendo o caminho mais rapido possivel.
+
+    Exemplos:
+    >>> rng = random.Random(7)
+    >>> tentativa(rng, Configuracao(1, 1), None)
+    1
+    >>> tentativa(rng, Configuracao(20, 5, usuarios=3, trocas=True), None) > 0
+    True
+    '''
+    if config.usuarios > 1:
+        return pacotes_com_trocas(rng, config, acumulados)
+    if acumulados is None:
+        return pacotes_sozinho_uniforme(rng, config)
+    return pacotes_sozinho(rng, config, acumulados)
+
+
+def simula_bloco(config: Configuracao, semente: int, bloco: int, tentativas: int) -> tuple[int, float, float, float, float]:
+    '''
+    Roda *tentativas* tentativas com o gerador do *bloco*. Cada bloco tem
+    seu proprio gerador, derivado de (*semente*, *bloco*), entao o
+    resultado nao depende de quantos processos sao usados.
+
+    Retorna (tentativas, soma, soma dos quadrados, minimo, maximo).
+    '''
+    rng = random.Random(str(semente) + ':' + str(bloco))
+    acumulados = config.pesos_acumulados()
+    soma = 0.0
+    soma_quadrados = 0.0
+    minimo = math.inf
+    maximo = -math.inf
+
+    for _ in range(tentativas):
+        valor = tentativa(rng, config, acumulados)
+        soma = soma + valor
+        soma_quadrados = soma_quadrados + valor * valor
+        minimo = min(minimo, valor)
+        maximo = max(maximo, valor)
+
+    return (tentativas, soma, soma_quadrados, minimo, maximo)
+
+
+def estima_pacotes(config: Configuracao, tentativas: int, semente: int = 0, processos: int | None = None) -> Resultado:
+    '''
+    Estima quantos pacotes sao precisos para completar o album, rodando
+    *tentativas* simulacoes independentes. As tentativas sao divididas em
+    blocos de TENTATIVAS_POR_BLOCO e os blocos sao distribuidos entre
+    *processos* processos (por padrao, um por CPU; com 1, roda aqui mesmo).
+
+    Exemplos:
+    >>> r = estima_pacotes(Configuracao(50, 5), 2000, semente=3, processos=1)
+    >>> r.tentativas
+    2000
+    >>> 40 < r.media < 50
+    True
+    >>> baixo, alto = r.intervalo()
+    >>> baixo < r.media < alto
+    True
+    >>> r == estima_pacotes(Configuracao(50, 5), 2000, semente=3, processos=2)
+    True
+    '''
+    if tentativas < 2:
+        raise ValueError('precisa de pelo menos duas tentativas')
+
+    blocos = []
+    bloco = 0
+    restantes = tentativas
+    while restantes > 0:
+        quantidade = min(restantes, TENTATIVAS_POR_BLOCO)
+        blocos.append((bloco, quantidade))
+        bloco = bloco + 1
+        restantes = restantes - quantidade
+
+    if processos is None:
+        processos = os.cpu_count() or 1
+
+    if processos == 1 or len(blocos) == 1:
+        parciais = [simula_bloco(config, semente, b, q) for b, q in blocos]
+    else:
+        with ProcessPoolExecutor(processos) as executor:
+            futuros = [executor.submit(simula_bloco, config, semente, b, q) for b, q in blocos]
+            parciais = [futuro.result() for futuro in futuros]
+
+    n = 0
+    soma = 0.0
+    soma_quadrados = 0.0
+    minimo = math.inf
+    maximo = -math.inf
+    for parcial in parciais:
+        n = n + parcial[0]
+        soma = soma + parcial[1]
+        soma_quadrados = soma_quadrados + parcial[2]
+        minimo = min(minimo, parcial[3])
+        maximo = max(maximo, parcial[4])
+
+    media = soma / n
+    variancia = max(soma_quadrados - n * media * media, 0.0) / (n - 1)
+    return Resultado(n, media, math.sqrt(variancia), minimo, maximo)
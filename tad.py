@@ -1,39 +1,137 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from ed import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, TextIO
+from album.figurinha import Figurinha
+from ed import Pegada, array, conta_uma_vez, tamanho_do_objeto, tamanho_profundo
 
 @dataclass
-class Figurinha:
+class Secao:
     '''
-    Uma figurinha tem um numero e uma quantidade.
-    Por padrão, quando criamos uma figurinha nova, ela tem quantidade 1.
-    
+    Uma secao do album (por exemplo, uma selecao), com as figurinhas
+    de numero *primeiro* ate *ultimo* (inclusive).
+
     Exemplos:
-    >>> messi = Figurinha(1)
-    >>> messi
-    Figurinha(numero=1, quantidade=1)
-    >>> neymar = Figurinha(10)
-    >>> neymar.numero
-    10
-    >>> neymar.quantidade
-    1
+    >>> brasil = Secao('Brasil', 1, 20)
+    >>> brasil.tamanho()
+    20
     '''
-    numero: int
-    quantidade: int = 1
+    nome: str
+    primeiro: int
+    ultimo: int
+
+    def tamanho(self) -> int:
+        return self.ultimo - self.primeiro + 1
+
+@dataclass
+class Catalogo:
+    '''
+    A definicao de um album: quantas figurinhas ele tem (numeradas de 1
+    ate *tamanho*), as secoes e o que fazer com numeros invalidos.
+
+    Se *invalidas* for 'erro', adicionar uma figurinha fora do album gera
+    ValueError. Se for 'ignora', a figurinha eh simplesmente descartada.
+
+    Exemplos:
+    >>> copa = Catalogo(670)
+    >>> copa.valida(1), copa.valida(670)
+    (True, True)
+    >>> copa.valida(0), copa.valida(671)
+    (False, False)
+    >>> Catalogo(10, invalidas='talvez')
+    Traceback (most recent call last):
+    ...
+    ValueError: invalidas deve ser 'erro' ou 'ignora'
+    >>> Catalogo(10, [Secao('A', 1, 11)])
+    Traceback (most recent call last):
+    ...
+    ValueError: secao A fora do album
+    '''
+    tamanho: int
+    secoes: list[Secao] = field(default_factory=list)
+    invalidas: str = 'erro'
+
+    def __post_init__(self) -> None:
+        if self.tamanho < 1:
+            raise ValueError('o album precisa ter pelo menos uma figurinha')
+        if self.invalidas != 'erro' and self.invalidas != 'ignora':
+            raise ValueError("invalidas deve ser 'erro' ou 'ignora'")
+        for secao in self.secoes:
+            if secao.primeiro < 1 or secao.ultimo > self.tamanho or secao.primeiro > secao.ultimo:
+                raise ValueError('secao ' + secao.nome + ' fora do album')
+
+    def valida(self, numero: int) -> bool:
+        return 0 < numero <= self.tamanho
+
+    def secao(self, nome: str) -> Secao:
+        '''
+        Retorna a secao com esse nome.
+
+        Exemplos:
+        >>> cat = Catalogo(40, [Secao('Brasil', 1, 20), Secao('Argentina', 21, 40)])
+        >>> cat.secao('Argentina')
+        Secao(nome='Argentina', primeiro=21, ultimo=40)
+        >>> cat.secao('Franca')
+        Traceback (most recent call last):
+        ...
+        KeyError: 'Franca'
+        '''
+        for secao in self.secoes:
+            if secao.nome == nome:
+                return secao
+        raise KeyError(nome)
+
+@dataclass
+class Completude:
+    '''
+    Quanto de um album (ou de uma secao) ja foi completado.
+    '''
+    total: int
+    presentes: int
+    faltantes: int
+
+    def percentual(self) -> float:
+        if self.total == 0:
+            return 0.0
+        return 100 * self.presentes / self.total
 
 class Colecao:
+    '''
+    Uma colecao de figurinhas feita com array.
+
+    Alem do array, a colecao guarda dois conjuntos de bits que sao
+    atualizados a cada adicao e remocao: em *presentes_bits* o bit n
+    esta ligado se a colecao tem a figurinha n, e em *repetidas_bits*
+    se tem a figurinha n repetida. Com eles as perguntas sobre as
+    figurinhas que faltam (e as trocas) nao precisam percorrer o album.
+    '''
     figurinhas: array[Figurinha]
+    catalogo: Catalogo | None
+    presentes_bits: int
+    repetidas_bits: int
     
-    def __init__(self):
+    def __init__(self, catalogo: Catalogo | None = None):
         '''
         Cria uma coleção começando com 15 espaços vazios (todos com numero 0).
+
+        Se for passado um catalogo, o array ja eh criado com o tamanho
+        do album e nunca mais precisa ser redimensionado.
         
         Exemplos:
         >>> x = Colecao()
         >>> len(x.figurinhas)
         15
+        >>> y = Colecao(Catalogo(670))
+        >>> len(y.figurinhas)
+        671
         '''
-        self.figurinhas = array(15, Figurinha(0))
+        self.catalogo = catalogo
+        self.presentes_bits = 0
+        self.repetidas_bits = 0
+        if catalogo is None:
+            self.figurinhas = array(15, Figurinha(0))
+        else:
+            self.figurinhas = array(catalogo.tamanho + 1, Figurinha(0))
 
     def redimensiona(self, tamanho_necessario: int) -> None:
         '''
@@ -73,8 +171,46 @@ class Colecao:
         >>> Album.adiciona_figurinha(ronaldo)
         >>> Album.gera_figurinhas_presentes()
         '4, 20'
+
+        Com catalogo, numeros fora do album sao rejeitados:
+        >>> copa = Colecao(Catalogo(10))
+        >>> copa.adiciona_figurinha(Figurinha(11))
+        Traceback (most recent call last):
+        ...
+        ValueError: figurinha 11 fora do album
+        >>> copa = Colecao(Catalogo(10, invalidas='ignora'))
+        >>> copa.adiciona_figurinha(Figurinha(11))
+        >>> copa.adiciona_figurinha(Figurinha(10))
+        >>> copa.gera_figurinhas_presentes()
+        '10'
         '''
-        num = figurinha.numero
+        self.adiciona_numero(figurinha.numero)
+
+    def adiciona_numero(self, num: int) -> None:
+        '''
+        Igual a adiciona_figurinha, mas recebe so o numero da figurinha.
+        So cria uma Figurinha quando o numero ainda nao esta na colecao.
+
+        Exemplos:
+        >>> copa = Colecao()
+        >>> copa.adiciona_numero(7)
+        >>> copa.adiciona_numero(7)
+        >>> copa.quantidade_de(7)
+        2
+        >>> copa.adiciona_numero(-1)
+        Traceback (most recent call last):
+        ...
+        ValueError: figurinha -1 fora do album
+        >>> copa.gera_figurinhas_presentes()
+        '7'
+        '''
+        if self.catalogo is not None and not self.catalogo.valida(num):
+            if self.catalogo.invalidas == 'erro':
+                raise ValueError('figurinha ' + str(num) + ' fora do album')
+            return
+        if num < 1:
+            raise ValueError('figurinha ' + str(num) + ' fora do album')
+
         tamanho_necessario = num + 1
         
         if tamanho_necessario > len(self.figurinhas):
@@ -82,8 +218,180 @@ class Colecao:
 
         if self.figurinhas[num].numero == 0:
             self.figurinhas[num] = Figurinha(num, 1)
+            self.presentes_bits = self.presentes_bits | (1 << num)
         else:
             self.figurinhas[num].quantidade = self.figurinhas[num].quantidade + 1
+            self.repetidas_bits = self.repetidas_bits | (1 << num)
+
+    def adiciona_lote(self, numeros: Iterable[int]) -> None:
+        '''
+        Adiciona varias figurinhas de uma vez, dadas so pelos numeros.
+        O resultado eh o mesmo de chamar adiciona_figurinha para cada uma,
+        mas o array eh redimensionado no maximo uma vez e nenhuma
+        Figurinha eh criada para numeros que ja estao na colecao.
+
+        Com catalogo e invalidas='erro', se algum numero estiver fora do
+        album nada eh adicionado.
+
+        Exemplos:
+        >>> copa = Colecao()
+        >>> copa.adiciona_lote([4, 20, 4, 100])
+        >>> copa.gera_figurinhas_presentes()
+        '4, 20, 100'
+        >>> copa.gera_figurinhas_repetidas()
+        '4 (1)'
+        >>> len(copa.figurinhas)
+        120
+        >>> limitada = Colecao(Catalogo(10))
+        >>> limitada.adiciona_lote([1, 2, 11])
+        Traceback (most recent call last):
+        ...
+        ValueError: figurinha 11 fora do album
+        >>> limitada.gera_figurinhas_presentes()
+        ''
+        >>> copa.adiciona_lote([5, -2])
+        Traceback (most recent call last):
+        ...
+        ValueError: figurinha -2 fora do album
+        >>> copa.gera_figurinhas_presentes()
+        '4, 20, 100'
+        '''
+        numeros = self.prepara_lote(numeros)
+        if len(numeros) == 0:
+            return
+
+        novas = 0
+        repetidas = 0
+        for num in numeros:
+            item_album = self.figurinhas[num]
+            if item_album.numero == 0:
+                self.figurinhas[num] = Figurinha(num, 1)
+                novas = novas | (1 << num)
+            else:
+                item_album.quantidade = item_album.quantidade + 1
+                repetidas = repetidas | (1 << num)
+
+        self.presentes_bits = self.presentes_bits | novas
+        self.repetidas_bits = self.repetidas_bits | repetidas
+
+    def prepara_lote(self, numeros: Iterable[int]) -> list[int]:
+        '''
+        Valida os numeros de um lote contra o catalogo (dando erro ou
+        descartando os invalidos, conforme o catalogo) e redimensiona o
+        array uma vez so para caber o maior deles. Retorna os numeros
+        validos.
+        '''
+        numeros = list(numeros)
+
+        if self.catalogo is not None:
+            validos = []
+            for num in numeros:
+                if self.catalogo.valida(num):
+                    validos.append(num)
+                elif self.catalogo.invalidas == 'erro':
+                    raise ValueError('figurinha ' + str(num) + ' fora do album')
+            numeros = validos
+
+        if len(numeros) > 0:
+            menor = min(numeros)
+            if menor < 1:
+                raise ValueError('figurinha ' + str(menor) + ' fora do album')
+            tamanho_necessario = max(numeros) + 1
+            if tamanho_necessario > len(self.figurinhas):
+                self.redimensiona(tamanho_necessario)
+
+        return numeros
+
+    def adiciona_lote_paralelo(self, numeros: Iterable[int], threads: int = 4) -> None:
+        '''
+        O mesmo que adiciona_lote, mas dividindo o trabalho entre *threads*
+        threads. O resultado eh igual ao de chamar adiciona_figurinha para
+        cada numero, na ordem.
+
+        Os numeros do lote (do menor ao maior) sao divididos em faixas
+        contiguas, uma por thread, e o trabalho eh feito em duas etapas,
+        nenhuma delas com trava. Na primeira, cada thread conta um pedaco
+        do lote em dicionarios so dela, um por faixa. Na segunda, cada
+        thread junta as contagens da sua faixa e atualiza so as posicoes
+        do array que aparecem nelas, montando os bits da faixa. No fim os
+        bits das faixas sao juntados nos bits da colecao. A memoria usada
+        depende do tamanho do lote, e nao dos numeros dele.
+
+        Lotes esparsos (menos numeros do que o tamanho da faixa entre o
+        menor e o maior) vao direto para adiciona_lote, que ja faz isso
+        sem o custo das threads.
+
+        Com o GIL as threads nao rodam ao mesmo tempo, e o ganho das
+        threads so aparece nas versoes do Python sem GIL (free-threaded).
+        Mas como cada posicao do array eh atualizada uma vez so, mesmo com
+        o GIL lotes grandes ficam mais rapidos que com adiciona_lote.
+
+        Exemplos:
+        >>> a = Colecao()
+        >>> b = Colecao()
+        >>> lote = [5, 1, 5, 3, 2, 3, 3, 4]
+        >>> a.adiciona_lote_paralelo(lote, threads=3)
+        >>> for n in lote:
+        ...     b.adiciona_figurinha(Figurinha(n))
+        >>> a.gera_figurinhas_repetidas() == b.gera_figurinhas_repetidas() == '3 (2), 5 (1)'
+        True
+        >>> (a.presentes_bits, a.repetidas_bits) == (b.presentes_bits, b.repetidas_bits)
+        True
+        >>> limitada = Colecao(Catalogo(10))
+        >>> limitada.adiciona_lote_paralelo([1, 2, 11])
+        Traceback (most recent call last):
+        ...
+        ValueError: figurinha 11 fora do album
+        '''
+        numeros = self.prepara_lote(numeros)
+        if len(numeros) == 0:
+            return
+        menor = min(numeros)
+        maior = max(numeros)
+        if threads <= 1 or len(numeros) < maior - menor + 1:
+            self.adiciona_lote(numeros)
+            return
+
+        pedaco = (len(numeros) + threads - 1) // threads
+        pedacos = [numeros[i:i + pedaco] for i in range(0, len(numeros), pedaco)]
+        largura = (maior - menor + threads) // threads
+        faixas = list(range(threads))
+
+        def conta(parte: list[int]) -> list[dict[int, int]]:
+            contagens: list[dict[int, int]] = [{} for _ in faixas]
+            for num in parte:
+                da_faixa = contagens[(num - menor) // largura]
+                da_faixa[num] = da_faixa.get(num, 0) + 1
+            return contagens
+
+        def aplica_faixa(faixa: int) -> tuple[int, int]:
+            inicio = menor + faixa * largura
+            quantidades: dict[int, int] = {}
+            for contagens in todas_as_contagens:
+                for num, quantidade in contagens[faixa].items():
+                    quantidades[num] = quantidades.get(num, 0) + quantidade
+
+            novas = 0
+            repetidas = 0
+            for num, quantidade in quantidades.items():
+                item_album = self.figurinhas[num]
+                if item_album.numero == 0:
+                    self.figurinhas[num] = Figurinha(num, quantidade)
+                    novas = novas | (1 << (num - inicio))
+                    if quantidade > 1:
+                        repetidas = repetidas | (1 << (num - inicio))
+                else:
+                    item_album.quantidade = item_album.quantidade + quantidade
+                    repetidas = repetidas | (1 << (num - inicio))
+            return (novas << inicio, repetidas << inicio)
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            todas_as_contagens = list(executor.map(conta, pedacos))
+            bits_das_faixas = list(executor.map(aplica_faixa, faixas))
+
+        for novas, repetidas in bits_das_faixas:
+            self.presentes_bits = self.presentes_bits | novas
+            self.repetidas_bits = self.repetidas_bits | repetidas
 
     def remove_figurinha(self, figurinha: Figurinha) -> None:
         '''
@@ -101,15 +409,32 @@ class Colecao:
         >>> copa.gera_figurinhas_presentes()
         ''
         '''
-        if figurinha.numero < len(self.figurinhas):
-            item_album = self.figurinhas[figurinha.numero]
+        self.remove_numero(figurinha.numero)
+
+    def remove_numero(self, num: int) -> None:
+        '''
+        Igual a remove_figurinha, mas recebe so o numero da figurinha.
+
+        Exemplos:
+        >>> copa = Colecao()
+        >>> copa.adiciona_numero(7)
+        >>> copa.remove_numero(7)
+        >>> copa.remove_numero(7)
+        >>> copa.remove_numero(-1)
+        >>> copa.quantidade_de(7)
+        0
+        '''
+        if 0 < num < len(self.figurinhas):
+            item_album = self.figurinhas[num]
 
             if item_album.numero != 0:
                 if item_album.quantidade > 1:
                     item_album.quantidade = item_album.quantidade - 1
+                    if item_album.quantidade == 1:
+                        self.repetidas_bits = self.repetidas_bits & ~(1 << num)
                 else:
-                    self.figurinhas[figurinha.numero] = Figurinha(0)
-                return
+                    self.figurinhas[num] = Figurinha(0)
+                    self.presentes_bits = self.presentes_bits & ~(1 << num)
         
     def gera_figurinhas_presentes(self) -> str:
             '''
@@ -183,6 +508,138 @@ class Colecao:
         
         return resultado_final
 
+    def completude(self, nome_secao: str | None = None) -> Completude:
+        '''
+        Diz quantas figurinhas do album ja tem e quantas faltam. Com
+        catalogo, as faltantes sao contadas em relacao ao album inteiro
+        (ou a uma secao dele). Sem catalogo, o album vai ate o maior
+        numero que a colecao ja teve.
+
+        Exemplos:
+        >>> cat = Catalogo(40, [Secao('Brasil', 1, 20), Secao('Argentina', 21, 40)])
+        >>> copa = Colecao(cat)
+        >>> for n in [1, 2, 2, 21, 40]:
+        ...     copa.adiciona_figurinha(Figurinha(n))
+        >>> copa.completude()
+        Completude(total=40, presentes=4, faltantes=36)
+        >>> copa.completude('Argentina')
+        Completude(total=20, presentes=2, faltantes=18)
+        >>> copa.completude().percentual()
+        10.0
+        >>> sem_catalogo = Colecao()
+        >>> sem_catalogo.adiciona_figurinha(Figurinha(3))
+        >>> sem_catalogo.completude()
+        Completude(total=3, presentes=1, faltantes=2)
+        >>> sem_catalogo.completude('Brasil')
+        Traceback (most recent call last):
+        ...
+        ValueError: colecao sem catalogo nao tem secoes
+        '''
+        if self.catalogo is None:
+            if nome_secao is not None:
+                raise ValueError('colecao sem catalogo nao tem secoes')
+            primeiro = 1
+            ultimo = self.tamanho_do_album()
+        elif nome_secao is None:
+            primeiro = 1
+            ultimo = self.catalogo.tamanho
+        else:
+            secao = self.catalogo.secao(nome_secao)
+            primeiro = secao.primeiro
+            ultimo = secao.ultimo
+
+        total = ultimo - primeiro + 1
+        mascara = (1 << total) - 1
+        presentes = ((self.presentes_bits >> primeiro) & mascara).bit_count()
+        return Completude(total, presentes, total - presentes)
+
+    def tamanho_do_album(self) -> int:
+        '''
+        O maior numero de figurinha do album: o tamanho do catalogo, ou,
+        sem catalogo, o maior numero que a colecao tem.
+
+        Exemplos:
+        >>> Colecao(Catalogo(670)).tamanho_do_album()
+        670
+        >>> c = Colecao()
+        >>> c.tamanho_do_album()
+        0
+        >>> c.adiciona_figurinha(Figurinha(42))
+        >>> c.tamanho_do_album()
+        42
+        '''
+        if self.catalogo is not None:
+            return self.catalogo.tamanho
+        return max(self.presentes_bits.bit_length() - 1, 0)
+
+    def iter_faltantes(self) -> Iterator[int]:
+        '''
+        Percorre, em ordem crescente, os numeros das figurinhas que faltam
+        no album (veja tamanho_do_album). So visita as que faltam.
+
+        Exemplos:
+        >>> c = Colecao(Catalogo(6))
+        >>> c.adiciona_figurinha(Figurinha(2))
+        >>> c.adiciona_figurinha(Figurinha(5))
+        >>> list(c.iter_faltantes())
+        [1, 3, 4, 6]
+        '''
+        tamanho = self.tamanho_do_album()
+        faltantes = ~self.presentes_bits & ((1 << (tamanho + 1)) - 2)
+
+        while faltantes != 0:
+            menor_bit = faltantes & -faltantes
+            yield menor_bit.bit_length() - 1
+            faltantes = faltantes ^ menor_bit
+
+    def conta_faltantes(self) -> int:
+        '''
+        Conta quantas figurinhas faltam no album.
+
+        Exemplos:
+        >>> c = Colecao(Catalogo(670))
+        >>> c.adiciona_figurinha(Figurinha(10))
+        >>> c.adiciona_figurinha(Figurinha(10))
+        >>> c.conta_faltantes()
+        669
+        '''
+        tamanho = self.tamanho_do_album()
+        mascara = (1 << (tamanho + 1)) - 2
+        return tamanho - (self.presentes_bits & mascara).bit_count()
+
+    def escreve_figurinhas_faltantes(self, saida: TextIO) -> None:
+        '''
+        Escreve em *saida* os numeros das figurinhas que faltam, no mesmo
+        formato de gera_figurinhas_presentes, sem montar a string inteira
+        na memoria.
+
+        Exemplos:
+        >>> import sys
+        >>> c = Colecao(Catalogo(5))
+        >>> c.adiciona_figurinha(Figurinha(3))
+        >>> c.escreve_figurinhas_faltantes(sys.stdout)
+        1, 2, 4, 5
+        '''
+        separador = ""
+        for numero in self.iter_faltantes():
+            saida.write(separador + str(numero))
+            separador = ", "
+
+    def gera_figurinhas_faltantes(self) -> str:
+        '''
+        Retorna uma string com os numeros das figurinhas que faltam.
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> c.adiciona_figurinha(Figurinha(2))
+        >>> c.adiciona_figurinha(Figurinha(5))
+        >>> c.gera_figurinhas_faltantes()
+        '1, 3, 4'
+        >>> Colecao().gera_figurinhas_faltantes()
+        ''
+        '''
+        return ", ".join(str(numero) for numero in self.iter_faltantes())
+
     def conta_figurinhas_trocaveis(self, colecao_destino: Colecao) -> int:
         """
         Conta quantas figurinhas repetidas eu tenho que a outra pessoa nao tem.
@@ -202,21 +659,8 @@ class Colecao:
         >>> c2.conta_figurinhas_trocaveis(c1)
         0
         """
-        quantidade_trocavel = 0
-        
-        for i in range(len(self.figurinhas)):
-            figurinha_origem = self.figurinhas[i]
-            
-            if figurinha_origem.numero != 0 and figurinha_origem.quantidade > 1:
-                tem_em_destino = False
-                if figurinha_origem.numero < len(colecao_destino.figurinhas):
-                    if colecao_destino.figurinhas[figurinha_origem.numero].numero != 0:
-                        tem_em_destino = True
-                
-                if not tem_em_destino:
-                    quantidade_trocavel = quantidade_trocavel + 1
-        
-        return quantidade_trocavel
+        trocaveis = self.repetidas_bits & ~colecao_destino.presentes_bits
+        return trocaveis.bit_count()
 
     def encontra_proxima_figurinha_trocavel(self, colecao_destino: Colecao, indice_inicial: int) -> Figurinha:
         """
@@ -241,24 +685,35 @@ class Colecao:
         >>> fig3.numero
         0
         """
-        indice_atual = indice_inicial
-        figurinha_encontrada = Figurinha(0)
-        
-        while indice_atual < len(self.figurinhas) and figurinha_encontrada.numero == 0:
-            fig = self.figurinhas[indice_atual]
-            
-            if fig.numero != 0 and fig.quantidade > 1:
-                tem_em_destino = False
-                if fig.numero < len(colecao_destino.figurinhas):
-                    if colecao_destino.figurinhas[fig.numero].numero != 0:
-                        tem_em_destino = True
-                
-                if not tem_em_destino:
-                    figurinha_encontrada = Figurinha(fig.numero)
-            
-            indice_atual = indice_atual + 1
-        
-        return figurinha_encontrada
+        numero = self.proximo_numero_trocavel(colecao_destino, indice_inicial)
+
+        if numero == -1:
+            return Figurinha(0)
+        return Figurinha(numero)
+
+    def proximo_numero_trocavel(self, colecao_destino: Colecao, indice_inicial: int) -> int:
+        """
+        Igual a encontra_proxima_figurinha_trocavel, mas retorna so o
+        numero da figurinha, ou -1 se nao tiver nenhuma. Usa os bits das
+        duas colecoes em vez de olhar posicao por posicao.
+
+        Exemplos:
+        >>> c1 = Colecao()
+        >>> c1.adiciona_lote([2, 2, 5, 5])
+        >>> c2 = Colecao()
+        >>> c2.adiciona_numero(1)
+        >>> c1.proximo_numero_trocavel(c2, 0)
+        2
+        >>> c1.proximo_numero_trocavel(c2, 3)
+        5
+        >>> c1.proximo_numero_trocavel(c2, 6)
+        -1
+        """
+        trocaveis = (self.repetidas_bits & ~colecao_destino.presentes_bits) >> indice_inicial
+
+        if trocaveis == 0:
+            return -1
+        return (trocaveis & -trocaveis).bit_length() - 1 + indice_inicial
 
     def troca_maxima(self, colecao2: Colecao) -> None:
         """
@@ -305,18 +760,237 @@ class Colecao:
         continuar = True
         
         while trocas_realizadas < numero_de_trocas and continuar:
-            figurinha_para_col2 = self.encontra_proxima_figurinha_trocavel(colecao2, indice_col1)
-            figurinha_para_col1 = colecao2.encontra_proxima_figurinha_trocavel(self, indice_col2)
+            numero_para_col2 = self.proximo_numero_trocavel(colecao2, indice_col1)
+            numero_para_col1 = colecao2.proximo_numero_trocavel(self, indice_col2)
             
-            if figurinha_para_col2.numero != 0 and figurinha_para_col1.numero != 0:
-                self.remove_figurinha(figurinha_para_col2)
-                colecao2.adiciona_figurinha(figurinha_para_col2)
+            if numero_para_col2 != -1 and numero_para_col1 != -1:
+                self.remove_numero(numero_para_col2)
+                colecao2.adiciona_numero(numero_para_col2)
                 
-                colecao2.remove_figurinha(figurinha_para_col1)
-                self.adiciona_figurinha(figurinha_para_col1)
+                colecao2.remove_numero(numero_para_col1)
+                self.adiciona_numero(numero_para_col1)
                 
                 trocas_realizadas += 1
-                indice_col1 = figurinha_para_col2.numero + 1
-                indice_col2 = figurinha_para_col1.numero + 1
+                indice_col1 = numero_para_col2 + 1
+                indice_col2 = numero_para_col1 + 1
             else:
-                continuar = False
\ No newline at end of file
+                continuar = False
+
+    def quantidade_de(self, numero: int) -> int:
+        '''
+        Quantas figurinhas com esse numero a colecao tem (0 se nao tiver
+        ou se o numero estiver fora do array).
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> c.adiciona_lote([3, 3, 3])
+        >>> c.quantidade_de(3), c.quantidade_de(4), c.quantidade_de(1000)
+        (3, 0, 0)
+        '''
+        if 0 < numero < len(self.figurinhas):
+            item_album = self.figurinhas[numero]
+            if item_album.numero != 0:
+                return item_album.quantidade
+        return 0
+
+    def define_quantidade(self, numero: int, quantidade: int) -> None:
+        '''
+        Faz a colecao ter exatamente *quantidade* figurinhas com esse
+        numero (0 tira a figurinha). O numero precisa ser valido.
+        '''
+        if numero < 1:
+            raise ValueError('figurinha ' + str(numero) + ' fora do album')
+        if quantidade == 0:
+            if numero < len(self.figurinhas):
+                self.figurinhas[numero] = Figurinha(0)
+        else:
+            if numero + 1 > len(self.figurinhas):
+                self.redimensiona(numero + 1)
+            item_album = self.figurinhas[numero]
+            if item_album.numero == 0:
+                self.figurinhas[numero] = Figurinha(numero, quantidade)
+            else:
+                item_album.quantidade = quantidade
+
+        bit = 1 << numero
+        if quantidade > 0:
+            self.presentes_bits = self.presentes_bits | bit
+        else:
+            self.presentes_bits = self.presentes_bits & ~bit
+        if quantidade > 1:
+            self.repetidas_bits = self.repetidas_bits | bit
+        else:
+            self.repetidas_bits = self.repetidas_bits & ~bit
+
+    def itera_quantidades(self) -> Iterator[tuple[int, int]]:
+        '''
+        Percorre as figurinhas da colecao em ordem crescente, como pares
+        (numero, quantidade).
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> c.adiciona_lote([3, 1, 3])
+        >>> list(c.itera_quantidades())
+        [(1, 1), (3, 2)]
+        '''
+        for i in range(1, self.presentes_bits.bit_length()):
+            item_album = self.figurinhas[i]
+            if item_album.numero != 0:
+                yield (i, item_album.quantidade)
+
+    def gera_diff(self, outra: Colecao) -> list[tuple[int, int]]:
+        '''
+        Retorna o que mudou desta colecao para *outra*: pares
+        (numero, diferenca de quantidade), em ordem crescente de numero,
+        so com as figurinhas que mudaram. Os dois arrays sao comparados
+        posicao por posicao, uma vez so.
+
+        Exemplos:
+        >>> antes = Colecao()
+        >>> antes.adiciona_lote([1, 2, 2, 5])
+        >>> depois = Colecao()
+        >>> depois.adiciona_lote([2, 5, 5, 5, 40])
+        >>> antes.gera_diff(depois)
+        [(1, -1), (2, -1), (5, 2), (40, 1)]
+        >>> depois.gera_diff(depois)
+        []
+        '''
+        deltas = []
+        fim = max(self.presentes_bits.bit_length(), outra.presentes_bits.bit_length())
+
+        for i in range(1, fim):
+            delta = outra.quantidade_de(i) - self.quantidade_de(i)
+            if delta != 0:
+                deltas.append((i, delta))
+
+        return deltas
+
+    def aplica_diff(self, deltas: list[tuple[int, int]]) -> None:
+        '''
+        Aplica as diferencas geradas por gera_diff. Uma quantidade nunca
+        fica negativa: remover mais do que tem so tira a figurinha.
+        Com catalogo, numeros fora do album seguem a regra de *invalidas*
+        (com 'erro', nada eh aplicado).
+
+        Exemplos:
+        >>> servidor = Colecao()
+        >>> servidor.adiciona_lote([1, 2, 2, 5])
+        >>> cliente = Colecao()
+        >>> cliente.adiciona_lote([2, 5, 5, 5, 40])
+        >>> servidor.aplica_diff(servidor.gera_diff(cliente))
+        >>> servidor.gera_figurinhas_presentes()
+        '2, 5, 40'
+        >>> servidor.gera_figurinhas_repetidas()
+        '5 (2)'
+        >>> servidor.aplica_diff([(2, -5)])
+        >>> servidor.gera_figurinhas_presentes()
+        '5, 40'
+        '''
+        if self.catalogo is not None:
+            validos = []
+            for numero, delta in deltas:
+                if self.catalogo.valida(numero):
+                    validos.append((numero, delta))
+                elif self.catalogo.invalidas == 'erro':
+                    raise ValueError('figurinha ' + str(numero) + ' fora do album')
+            deltas = validos
+
+        maior = 0
+        for numero, delta in deltas:
+            if delta > 0 and numero > maior:
+                maior = numero
+        if maior + 1 > len(self.figurinhas):
+            self.redimensiona(maior + 1)
+
+        for numero, delta in deltas:
+            if numero > 0:
+                quantidade = self.quantidade_de(numero) + delta
+                self.define_quantidade(numero, max(quantidade, 0))
+
+    def mescla(self, outra: Colecao, modo: str = 'soma') -> Colecao:
+        '''
+        Retorna uma colecao nova juntando esta com *outra*, posicao por
+        posicao. O *modo* diz como juntar as quantidades:
+        'uniao' (uma de cada figurinha que aparece em alguma das duas),
+        'maximo' (a maior das duas quantidades) ou 'soma'.
+        A colecao nova usa o catalogo desta.
+
+        Exemplos:
+        >>> a = Colecao()
+        >>> a.adiciona_lote([1, 1, 3])
+        >>> b = Colecao()
+        >>> b.adiciona_lote([1, 1, 1, 4])
+        >>> a.mescla(b, 'uniao').gera_figurinhas_repetidas()
+        ''
+        >>> a.mescla(b, 'maximo').gera_figurinhas_repetidas()
+        '1 (2)'
+        >>> s = a.mescla(b)
+        >>> s.gera_figurinhas_presentes(), s.gera_figurinhas_repetidas()
+        ('1, 3, 4', '1 (4)')
+        >>> a.mescla(b, 'media')
+        Traceback (most recent call last):
+        ...
+        ValueError: modo deve ser 'uniao', 'maximo' ou 'soma'
+        '''
+        if modo != 'uniao' and modo != 'maximo' and modo != 'soma':
+            raise ValueError("modo deve ser 'uniao', 'maximo' ou 'soma'")
+
+        resultado = Colecao(self.catalogo)
+        fim = max(self.presentes_bits.bit_length(), outra.presentes_bits.bit_length())
+        deltas = []
+
+        for i in range(1, fim):
+            qa = self.quantidade_de(i)
+            qb = outra.quantidade_de(i)
+            if modo == 'uniao':
+                quantidade = 1 if qa > 0 or qb > 0 else 0
+            elif modo == 'maximo':
+                quantidade = max(qa, qb)
+            else:
+                quantidade = qa + qb
+            if quantidade > 0:
+                deltas.append((i, quantidade))
+
+        resultado.aplica_diff(deltas)
+        return resultado
+
+    def footprint(self, visitados: set[int] | None = None) -> Pegada:
+        '''
+        Quantos bytes a colecao ocupa (ver ed.Pegada). As posicoes do
+        array depois da maior figurinha presente (ou do tamanho do album,
+        com catalogo) sao capacidade ociosa: sobras do tamanho inicial e das
+        duplicacoes de redimensiona. Cada objeto eh contado uma vez so,
+        entao a Figurinha(0) compartilhada pelas posicoes vazias entra uma
+        vez, e objetos em *visitados* (de outras colecoes) nao entram.
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> c.adiciona_lote([1, 2, 16])
+        >>> len(c.figurinhas)
+        30
+        >>> p = c.footprint()
+        >>> p.nos
+        0
+        >>> p.capacidade_ociosa >= 13 * 8
+        True
+        >>> d = Colecao(Catalogo(16))
+        >>> d.adiciona_lote([1, 2, 16])
+        >>> d.footprint().capacidade_ociosa
+        0
+        '''
+        if visitados is None:
+            visitados = set()
+        if not conta_uma_vez(self, visitados):
+            return Pegada()
+
+        if self.catalogo is not None:
+            usados = self.catalogo.tamanho + 1
+        else:
+            usados = self.presentes_bits.bit_length()
+
+        pegada = self.figurinhas.footprint(visitados, usados)
+        pegada.container = (pegada.container + tamanho_do_objeto(self)
+                            + tamanho_profundo(self.presentes_bits, visitados)
+                            + tamanho_profundo(self.repetidas_bits, visitados)
+                            + tamanho_profundo(self.catalogo, visitados))
+        return pegada
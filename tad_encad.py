@@ -0,0 +1,754 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Iterable, Iterator, TextIO
+from album.figurinha import Figurinha
+from ed import Pegada, conta_uma_vez, tamanho_do_objeto, tamanho_profundo
+
+@dataclass
+class No:
+    '''
+    Um no da lista que guarda uma figurinha e aponta pro proximo no.
+    '''
+    figurinha: Figurinha
+    proximo: No | None = None
+
+class Colecao:
+    '''
+    Uma colecao de figurinhas feita com lista encadeada.
+    Usa uma sentinela no começo pra facilitar as operacoes.
+
+    Alem da lista, a colecao guarda dois conjuntos de bits que sao
+    atualizados a cada adicao e remocao: em *presentes_bits* o bit n
+    esta ligado se a colecao tem a figurinha n, e em *repetidas_bits*
+    se tem a figurinha n repetida. Com eles as perguntas sobre as
+    figurinhas que faltam (e as trocas) nao precisam percorrer a lista.
+    '''
+    sentinela: No
+    presentes_bits: int
+    repetidas_bits: int
+    
+    def __init__(self):
+        '''
+        Cria uma colecao vazia usando lista encadeada com sentinela.
+        A sentinela eh um no especial com Figurinha(0) que aponta pra None.
+        
+        Exemplos:
+        >>> x = Colecao()
+        >>> x.sentinela.figurinha.numero
+        0
+        >>> x.sentinela.proximo is None
+        True
+        '''
+        self.sentinela = No(Figurinha(0), None)
+        self.ultimo_no_encontrado: No | None = None
+        self.presentes_bits = 0
+        self.repetidas_bits = 0
+
+    def busca_no(self, numero: int) -> No | None:
+        '''
+        Procura um no que tenha a figurinha com esse numero.
+        Retorna o no se achar, ou None se nao achar.
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> c.adiciona_figurinha(Figurinha(5))
+        >>> no = c.busca_no(5)
+        >>> no.figurinha.numero
+        5
+        >>> c.busca_no(10) is None
+        True
+        '''
+        atual = self.sentinela.proximo
+        
+        while atual is not None:
+            if atual.figurinha.numero == numero:
+                return atual
+            atual = atual.proximo
+        
+        return None
+
+    def adiciona_figurinha(self, figurinha: Figurinha) -> None:
+        '''
+        Adiciona uma figurinha na colecao. Se ja tiver essa figurinha,
+        apenas aumenta a quantidade. Se nao tiver, cria um no novo
+        e coloca na ordem certa (crescente).
+        
+        Exemplos:
+        >>> Album = Colecao()
+        >>> neymar = Figurinha(4)
+        >>> Album.adiciona_figurinha(neymar)
+        >>> Album.adiciona_figurinha(neymar)
+        >>> ronaldo = Figurinha(20)
+        >>> Album.adiciona_figurinha(ronaldo)
+        >>> Album.gera_figurinhas_presentes()
+        '4, 20'
+        '''
+        self.adiciona_numero(figurinha.numero)
+
+    def adiciona_numero(self, numero: int) -> None:
+        '''
+        Igual a adiciona_figurinha, mas recebe so o numero da figurinha.
+        A lista eh percorrida uma vez so, e uma Figurinha so eh criada
+        quando o numero ainda nao esta na colecao.
+
+        Exemplos:
+        >>> copa = Colecao()
+        >>> copa.adiciona_numero(7)
+        >>> copa.adiciona_numero(3)
+        >>> copa.adiciona_numero(7)
+        >>> copa.gera_figurinhas_presentes()
+        '3, 7'
+        >>> copa.quantidade_de(7)
+        2
+        >>> copa.adiciona_numero(-1)
+        Traceback (most recent call last):
+        ...
+        ValueError: figurinha -1 fora do album
+        '''
+        if numero < 1:
+            raise ValueError('figurinha ' + str(numero) + ' fora do album')
+
+        anterior = self.sentinela
+        atual = self.sentinela.proximo
+
+        while atual is not None and atual.figurinha.numero < numero:
+            anterior = atual
+            atual = atual.proximo
+
+        if atual is not None and atual.figurinha.numero == numero:
+            atual.figurinha.quantidade = atual.figurinha.quantidade + 1
+            self.repetidas_bits = self.repetidas_bits | (1 << numero)
+        else:
+            novo_no = No(Figurinha(numero, 1), atual)
+            anterior.proximo = novo_no
+            self.presentes_bits = self.presentes_bits | (1 << numero)
+
+    def adiciona_lote(self, numeros: Iterable[int]) -> None:
+        '''
+        Adiciona varias figurinhas de uma vez, dadas so pelos numeros.
+        O resultado eh o mesmo de chamar adiciona_figurinha para cada uma,
+        mas os numeros sao ordenados e a lista eh percorrida uma vez so,
+        em vez de uma busca do comeco da lista para cada figurinha.
+
+        Exemplos:
+        >>> copa = Colecao()
+        >>> copa.adiciona_figurinha(Figurinha(7))
+        >>> copa.adiciona_lote([20, 4, 7, 4, 1])
+        >>> copa.gera_figurinhas_presentes()
+        '1, 4, 7, 20'
+        >>> copa.gera_figurinhas_repetidas()
+        '4 (1), 7 (1)'
+        >>> copa.adiciona_lote([30, -2])
+        Traceback (most recent call last):
+        ...
+        ValueError: figurinha -2 fora do album
+        >>> copa.gera_figurinhas_presentes()
+        '1, 4, 7, 20'
+        '''
+        numeros = sorted(numeros)
+        if len(numeros) > 0 and numeros[0] < 1:
+            raise ValueError('figurinha ' + str(numeros[0]) + ' fora do album')
+
+        anterior = self.sentinela
+        atual = self.sentinela.proximo
+
+        for num in numeros:
+            while atual is not None and atual.figurinha.numero < num:
+                anterior = atual
+                atual = atual.proximo
+
+            if atual is not None and atual.figurinha.numero == num:
+                atual.figurinha.quantidade = atual.figurinha.quantidade + 1
+                self.repetidas_bits = self.repetidas_bits | (1 << num)
+            else:
+                atual = No(Figurinha(num, 1), atual)
+                anterior.proximo = atual
+                self.presentes_bits = self.presentes_bits | (1 << num)
+
+    def remove_figurinha(self, figurinha: Figurinha) -> None:
+        '''
+        Remove uma figurinha da colecao. Se tiver mais de uma, so diminui
+        a quantidade. Se tiver apenas uma, tira o no da lista.
+        Se nao tiver a figurinha, nao faz nada.
+        
+        Exemplos:
+        >>> copa = Colecao()
+        >>> fig1 = Figurinha(1)
+        >>> copa.adiciona_figurinha(fig1)
+        >>> copa.adiciona_figurinha(fig1)
+        >>> copa.remove_figurinha(fig1)
+        >>> copa.remove_figurinha(fig1)
+        >>> copa.gera_figurinhas_presentes()
+        ''
+        '''
+        self.remove_numero(figurinha.numero)
+
+    def remove_numero(self, numero: int) -> None:
+        '''
+        Igual a remove_figurinha, mas recebe so o numero da figurinha.
+        Se a colecao nao tem o numero, nem percorre a lista.
+
+        Exemplos:
+        >>> copa = Colecao()
+        >>> copa.adiciona_numero(7)
+        >>> copa.remove_numero(7)
+        >>> copa.remove_numero(7)
+        >>> copa.remove_numero(-1)
+        >>> copa.quantidade_de(7)
+        0
+        '''
+        if numero < 1 or (self.presentes_bits >> numero) & 1 == 0:
+            return
+
+        anterior = self.sentinela
+        atual = self.sentinela.proximo
+        
+        while atual is not None:
+            if atual.figurinha.numero == numero:
+                if atual.figurinha.quantidade > 1:
+                    atual.figurinha.quantidade = atual.figurinha.quantidade - 1
+                    if atual.figurinha.quantidade == 1:
+                        self.repetidas_bits = self.repetidas_bits & ~(1 << numero)
+                else:
+                    anterior.proximo = atual.proximo
+                    self.presentes_bits = self.presentes_bits & ~(1 << numero)
+                return
+            
+            anterior = atual
+            atual = atual.proximo
+
+    def quantidade_de(self, numero: int) -> int:
+        '''
+        Quantas figurinhas com esse numero a colecao tem (0 se nao tiver).
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> c.adiciona_lote([3, 3, 3])
+        >>> c.quantidade_de(3), c.quantidade_de(4)
+        (3, 0)
+        '''
+        if numero < 0 or (self.presentes_bits >> numero) & 1 == 0:
+            return 0
+        if (self.repetidas_bits >> numero) & 1 == 0:
+            return 1
+
+        no = self.busca_no(numero)
+        assert no is not None
+        return no.figurinha.quantidade
+
+    def gera_figurinhas_presentes(self) -> str:
+        '''
+        Retorna uma string com os numeros das figurinhas que tem na colecao.
+        
+        Exemplos:
+        >>> copa = Colecao()
+        >>> copa.adiciona_figurinha(Figurinha(1))
+        >>> copa.adiciona_figurinha(Figurinha(3))
+        >>> copa.adiciona_figurinha(Figurinha(5))
+        >>> copa.gera_figurinhas_presentes()
+        '1, 3, 5'
+        >>> vazia = Colecao()
+        >>> vazia.gera_figurinhas_presentes()
+        ''
+        '''
+        resultado_final = ""
+        primeiro_item_encontrado = True
+        
+        atual = self.sentinela.proximo
+        
+        while atual is not None:
+            numero_str = str(atual.figurinha.numero)
+            
+            if primeiro_item_encontrado:
+                resultado_final = numero_str
+                primeiro_item_encontrado = False
+            else:
+                resultado_final = resultado_final + ", " + numero_str
+            
+            atual = atual.proximo
+        
+        return resultado_final
+
+    def gera_figurinhas_repetidas(self) -> str:
+        '''
+        Retorna uma string com as figurinhas repetidas, mostrando quantas
+        a mais cada uma tem.
+        
+        Exemplos:
+        >>> copa = Colecao()
+        >>> fig1 = Figurinha(1)
+        >>> fig2 = Figurinha(2)
+        >>> copa.adiciona_figurinha(fig1)
+        >>> copa.adiciona_figurinha(fig1)
+        >>> copa.adiciona_figurinha(fig1)
+        >>> copa.adiciona_figurinha(fig2)
+        >>> copa.adiciona_figurinha(fig2)
+        >>> copa.gera_figurinhas_repetidas()
+        '1 (2), 2 (1)'
+        >>> vazia = Colecao()
+        >>> vazia.gera_figurinhas_repetidas()
+        ''
+        '''
+        resultado_final = ""
+        primeiro_item_encontrado = True
+        atual = self.sentinela.proximo
+        
+        while atual is not None:
+            if atual.figurinha.quantidade > 1:
+                quant_repetida = atual.figurinha.quantidade - 1
+                item_str = str(atual.figurinha.numero) + " (" + str(quant_repetida) + ")"
+                
+                if primeiro_item_encontrado:
+                    resultado_final = item_str
+                    primeiro_item_encontrado = False
+                else:
+                    resultado_final = resultado_final + ", " + item_str
+            
+            atual = atual.proximo
+        
+        return resultado_final
+
+    def tamanho_do_album(self) -> int:
+        '''
+        O maior numero de figurinha que a colecao tem. As figurinhas que
+        faltam sao contadas de 1 ate esse numero.
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> c.tamanho_do_album()
+        0
+        >>> c.adiciona_figurinha(Figurinha(42))
+        >>> c.tamanho_do_album()
+        42
+        '''
+        return max(self.presentes_bits.bit_length() - 1, 0)
+
+    def iter_faltantes(self) -> Iterator[int]:
+        '''
+        Percorre, em ordem crescente, os numeros das figurinhas que faltam
+        no album (veja tamanho_do_album). So visita as que faltam.
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> c.adiciona_figurinha(Figurinha(2))
+        >>> c.adiciona_figurinha(Figurinha(6))
+        >>> list(c.iter_faltantes())
+        [1, 3, 4, 5]
+        '''
+        tamanho = self.tamanho_do_album()
+        faltantes = ~self.presentes_bits & ((1 << (tamanho + 1)) - 2)
+
+        while faltantes != 0:
+            menor_bit = faltantes & -faltantes
+            yield menor_bit.bit_length() - 1
+            faltantes = faltantes ^ menor_bit
+
+    def conta_faltantes(self) -> int:
+        '''
+        Conta quantas figurinhas faltam no album.
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> c.adiciona_figurinha(Figurinha(10))
+        >>> c.adiciona_figurinha(Figurinha(10))
+        >>> c.conta_faltantes()
+        9
+        '''
+        tamanho = self.tamanho_do_album()
+        mascara = (1 << (tamanho + 1)) - 2
+        return tamanho - (self.presentes_bits & mascara).bit_count()
+
+    def escreve_figurinhas_faltantes(self, saida: TextIO) -> None:
+        '''
+        Escreve em *saida* os numeros das figurinhas que faltam, no mesmo
+        formato de gera_figurinhas_presentes, sem montar a string inteira
+        na memoria.
+
+        Exemplos:
+        >>> import sys
+        >>> c = Colecao()
+        >>> c.adiciona_figurinha(Figurinha(3))
+        >>> c.adiciona_figurinha(Figurinha(5))
+        >>> c.escreve_figurinhas_faltantes(sys.stdout)
+        1, 2, 4
+        '''
+        separador = ""
+        for numero in self.iter_faltantes():
+            saida.write(separador + str(numero))
+            separador = ", "
+
+    def gera_figurinhas_faltantes(self) -> str:
+        '''
+        Retorna uma string com os numeros das figurinhas que faltam.
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> c.adiciona_figurinha(Figurinha(2))
+        >>> c.adiciona_figurinha(Figurinha(5))
+        >>> c.gera_figurinhas_faltantes()
+        '1, 3, 4'
+        >>> Colecao().gera_figurinhas_faltantes()
+        ''
+        '''
+        return ", ".join(str(numero) for numero in self.iter_faltantes())
+
+    def conta_figurinhas_trocaveis(self, colecao_destino: Colecao) -> int:
+        """
+        Conta quantas figurinhas repetidas eu tenho que a outra pessoa nao tem.
+        So da pra trocar se eu tiver repetida e o outro nao tiver nenhuma.
+        
+        Exemplos:
+        >>> c1 = Colecao()
+        >>> c1.adiciona_figurinha(Figurinha(1))
+        >>> c1.adiciona_figurinha(Figurinha(1))
+        >>> c1.adiciona_figurinha(Figurinha(2))
+        >>> c1.adiciona_figurinha(Figurinha(2))
+        >>> c2 = Colecao()
+        >>> c2.adiciona_figurinha(Figurinha(1))
+        >>> c2.adiciona_figurinha(Figurinha(3))
+        >>> c1.conta_figurinhas_trocaveis(c2)
+        1
+        >>> c2.conta_figurinhas_trocaveis(c1)
+        0
+        """
+        trocaveis = self.repetidas_bits & ~colecao_destino.presentes_bits
+        return trocaveis.bit_count()
+    
+    def encontra_proxima_figurinha_trocavel(self, colecao_destino: Colecao, no_inicial: No | None) -> Figurinha:
+        """
+        Procura a proxima figurinha que da pra trocar, comecando de um no.
+        Retorna a primeira figurinha repetida que o outro nao tem.
+        
+        Exemplos:
+        >>> c1 = Colecao()
+        >>> c1.adiciona_figurinha(Figurinha(2))
+        >>> c1.adiciona_figurinha(Figurinha(2))
+        >>> c1.adiciona_figurinha(Figurinha(5))
+        >>> c1.adiciona_figurinha(Figurinha(5))
+        >>> c2 = Colecao()
+        >>> c2.adiciona_figurinha(Figurinha(1))
+        >>> fig = c1.encontra_proxima_figurinha_trocavel(c2, None)
+        >>> fig.numero
+        2
+        >>> fig2 = c1.encontra_proxima_figurinha_trocavel(c2, c1.ultimo_no_encontrado)
+        >>> fig2.numero
+        5
+        >>> fig3 = c1.encontra_proxima_figurinha_trocavel(c2, c1.ultimo_no_encontrado)
+        >>> fig3.numero
+        0
+        """
+        numero = self.proximo_numero_trocavel(colecao_destino, no_inicial)
+
+        if numero == -1:
+            return Figurinha(0)
+        return Figurinha(numero)
+
+    def proximo_numero_trocavel(self, colecao_destino: Colecao, no_inicial: No | None) -> int:
+        """
+        Igual a encontra_proxima_figurinha_trocavel, mas retorna so o
+        numero da figurinha, ou -1 se nao tiver nenhuma. Para no primeiro
+        no que serve, e olha os bits do destino em vez de percorrer a
+        lista dele.
+
+        Exemplos:
+        >>> c1 = Colecao()
+        >>> c1.adiciona_lote([2, 2, 5, 5])
+        >>> c2 = Colecao()
+        >>> c2.adiciona_numero(1)
+        >>> c1.proximo_numero_trocavel(c2, None)
+        2
+        >>> c1.proximo_numero_trocavel(c2, c1.ultimo_no_encontrado)
+        5
+        >>> c1.proximo_numero_trocavel(c2, c1.ultimo_no_encontrado)
+        -1
+        """
+        if no_inicial is None:
+            atual = self.sentinela.proximo
+        else:
+            atual = no_inicial.proximo
+
+        self.ultimo_no_encontrado = None
+        presentes_destino = colecao_destino.presentes_bits
+
+        while atual is not None:
+            if atual.figurinha.quantidade > 1 and (presentes_destino >> atual.figurinha.numero) & 1 == 0:
+                self.ultimo_no_encontrado = atual
+                return atual.figurinha.numero
+
+            atual = atual.proximo
+
+        return -1
+
+    def troca_maxima(self, colecao2: Colecao) -> None:
+        """
+        Faz a troca de figurinhas entre duas colecoes. Cada um da figurinhas
+        repetidas que tem e que o outro ainda nao tem. A troca so acontece
+        se os dois tiverem algo pra trocar (interesse mutuo). As trocas sao
+        feitas em ordem crescente de numero.
+        
+        Exemplos:
+        >>> c = Colecao()
+        >>> c.adiciona_figurinha(Figurinha(2))
+        >>> c.adiciona_figurinha(Figurinha(2))
+        >>> c.adiciona_figurinha(Figurinha(4))
+        >>> c.adiciona_figurinha(Figurinha(4))
+        >>> c.adiciona_figurinha(Figurinha(7))
+        >>> c.adiciona_figurinha(Figurinha(7))
+        >>> c.adiciona_figurinha(Figurinha(1))
+        >>> c.adiciona_figurinha(Figurinha(1))
+        >>> d = Colecao()
+        >>> d.adiciona_figurinha(Figurinha(2))
+        >>> d.adiciona_figurinha(Figurinha(6))
+        >>> d.adiciona_figurinha(Figurinha(6))
+        >>> d.adiciona_figurinha(Figurinha(8))
+        >>> d.adiciona_figurinha(Figurinha(8))
+        >>> d.adiciona_figurinha(Figurinha(10))
+        >>> d.adiciona_figurinha(Figurinha(10))
+        >>> c.troca_maxima(d)
+        >>> c.gera_figurinhas_presentes()
+        '1, 2, 4, 6, 7, 8, 10'
+        >>> c.gera_figurinhas_repetidas()
+        '2 (1)'
+        >>> d.gera_figurinhas_presentes()
+        '1, 2, 4, 6, 7, 8, 10'
+        >>> d.gera_figurinhas_repetidas()
+        ''
+        """
+        quantidade_col1_pode_dar = self.conta_figurinhas_trocaveis(colecao2)
+        quantidade_col2_pode_dar = colecao2.conta_figurinhas_trocaveis(self)
+        numero_de_trocas = min(quantidade_col1_pode_dar, quantidade_col2_pode_dar)
+        
+        trocas_realizadas = 0
+        no_col1 = None
+        no_col2 = None
+        
+        continuar = True
+        
+        while trocas_realizadas < numero_de_trocas and continuar:
+            numero_para_col2 = self.proximo_numero_trocavel(colecao2, no_col1)
+            no_col1 = self.ultimo_no_encontrado
+            
+            numero_para_col1 = colecao2.proximo_numero_trocavel(self, no_col2)
+            no_col2 = colecao2.ultimo_no_encontrado
+            
+            if numero_para_col2 != -1 and numero_para_col1 != -1:
+                self.remove_numero(numero_para_col2)
+                colecao2.adiciona_numero(numero_para_col2)
+                
+                colecao2.remove_numero(numero_para_col1)
+                self.adiciona_numero(numero_para_col1)
+                
+                trocas_realizadas = trocas_realizadas + 1
+            else:
+                continuar = False
+
+    def itera_quantidades(self) -> Iterator[tuple[int, int]]:
+        '''
+        Percorre as figurinhas da colecao em ordem crescente, como pares
+        (numero, quantidade).
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> c.adiciona_lote([3, 1, 3])
+        >>> list(c.itera_quantidades())
+        [(1, 1), (3, 2)]
+        '''
+        atual = self.sentinela.proximo
+
+        while atual is not None:
+            yield (atual.figurinha.numero, atual.figurinha.quantidade)
+            atual = atual.proximo
+
+    def gera_diff(self, outra: Colecao) -> list[tuple[int, int]]:
+        '''
+        Retorna o que mudou desta colecao para *outra*: pares
+        (numero, diferenca de quantidade), em ordem crescente de numero,
+        so com as figurinhas que mudaram. As duas listas ja estao em
+        ordem, entao sao percorridas juntas uma vez so (intercalacao).
+
+        Exemplos:
+        >>> antes = Colecao()
+        >>> antes.adiciona_lote([1, 2, 2, 5])
+        >>> depois = Colecao()
+        >>> depois.adiciona_lote([2, 5, 5, 5, 40])
+        >>> antes.gera_diff(depois)
+        [(1, -1), (2, -1), (5, 2), (40, 1)]
+        >>> depois.gera_diff(depois)
+        []
+        '''
+        deltas = []
+        a = self.sentinela.proximo
+        b = outra.sentinela.proximo
+
+        while a is not None or b is not None:
+            if b is None or (a is not None and a.figurinha.numero < b.figurinha.numero):
+                deltas.append((a.figurinha.numero, -a.figurinha.quantidade))
+                a = a.proximo
+            elif a is None or b.figurinha.numero < a.figurinha.numero:
+                deltas.append((b.figurinha.numero, b.figurinha.quantidade))
+                b = b.proximo
+            else:
+                delta = b.figurinha.quantidade - a.figurinha.quantidade
+                if delta != 0:
+                    deltas.append((a.figurinha.numero, delta))
+                a = a.proximo
+                b = b.proximo
+
+        return deltas
+
+    def aplica_diff(self, deltas: list[tuple[int, int]]) -> None:
+        '''
+        Aplica as diferencas geradas por gera_diff. Os pares sao ordenados
+        e a lista eh percorrida uma vez so. Uma quantidade nunca fica
+        negativa: remover mais do que tem so tira a figurinha.
+
+        Exemplos:
+        >>> servidor = Colecao()
+        >>> servidor.adiciona_lote([1, 2, 2, 5])
+        >>> cliente = Colecao()
+        >>> cliente.adiciona_lote([2, 5, 5, 5, 40])
+        >>> servidor.aplica_diff(servidor.gera_diff(cliente))
+        >>> servidor.gera_figurinhas_presentes()
+        '2, 5, 40'
+        >>> servidor.gera_figurinhas_repetidas()
+        '5 (2)'
+        >>> servidor.aplica_diff([(2, -5)])
+        >>> servidor.gera_figurinhas_presentes()
+        '5, 40'
+        '''
+        anterior = self.sentinela
+        atual = self.sentinela.proximo
+
+        for numero, delta in sorted(deltas):
+            if numero < 1:
+                continue
+            while atual is not None and atual.figurinha.numero < numero:
+                anterior = atual
+                atual = atual.proximo
+
+            if atual is not None and atual.figurinha.numero == numero:
+                quantidade = atual.figurinha.quantidade + delta
+                if quantidade > 0:
+                    atual.figurinha.quantidade = quantidade
+                else:
+                    anterior.proximo = atual.proximo
+                    atual = atual.proximo
+            else:
+                quantidade = delta
+                if quantidade > 0:
+                    atual = No(Figurinha(numero, quantidade), atual)
+                    anterior.proximo = atual
+
+            bit = 1 << numero
+            if quantidade > 0:
+                self.presentes_bits = self.presentes_bits | bit
+            else:
+                self.presentes_bits = self.presentes_bits & ~bit
+            if quantidade > 1:
+                self.repetidas_bits = self.repetidas_bits | bit
+            else:
+                self.repetidas_bits = self.repetidas_bits & ~bit
+
+    def mescla(self, outra: Colecao, modo: str = 'soma') -> Colecao:
+        '''
+        Retorna uma colecao nova juntando esta com *outra* numa unica
+        intercalacao das duas listas. O *modo* diz como juntar as
+        quantidades: 'uniao' (uma de cada figurinha que aparece em alguma
+        das duas), 'maximo' (a maior das duas quantidades) ou 'soma'.
+
+        Exemplos:
+        >>> a = Colecao()
+        >>> a.adiciona_lote([1, 1, 3])
+        >>> b = Colecao()
+        >>> b.adiciona_lote([1, 1, 1, 4])
+        >>> a.mescla(b, 'uniao').gera_figurinhas_repetidas()
+        ''
+        >>> a.mescla(b, 'maximo').gera_figurinhas_repetidas()
+        '1 (2)'
+        >>> s = a.mescla(b)
+        >>> s.gera_figurinhas_presentes(), s.gera_figurinhas_repetidas()
+        ('1, 3, 4', '1 (4)')
+        >>> a.mescla(b, 'media')
+        Traceback (most recent call last):
+        ...
+        ValueError: modo deve ser 'uniao', 'maximo' ou 'soma'
+        '''
+        if modo != 'uniao' and modo != 'maximo' and modo != 'soma':
+            raise ValueError("modo deve ser 'uniao', 'maximo' ou 'soma'")
+
+        resultado = Colecao()
+        ultimo = resultado.sentinela
+        a = self.sentinela.proximo
+        b = outra.sentinela.proximo
+
+        while a is not None or b is not None:
+            if b is None or (a is not None and a.figurinha.numero < b.figurinha.numero):
+                numero = a.figurinha.numero
+                qa = a.figurinha.quantidade
+                qb = 0
+                a = a.proximo
+            elif a is None or b.figurinha.numero < a.figurinha.numero:
+                numero = b.figurinha.numero
+                qa = 0
+                qb = b.figurinha.quantidade
+                b = b.proximo
+            else:
+                numero = a.figurinha.numero
+                qa = a.figurinha.quantidade
+                qb = b.figurinha.quantidade
+                a = a.proximo
+                b = b.proximo
+
+            if modo == 'uniao':
+                quantidade = 1
+            elif modo == 'maximo':
+                quantidade = max(qa, qb)
+            else:
+                quantidade = qa + qb
+
+            ultimo.proximo = No(Figurinha(numero, quantidade), None)
+            ultimo = ultimo.proximo
+            resultado.presentes_bits = resultado.presentes_bits | (1 << numero)
+            if quantidade > 1:
+                resultado.repetidas_bits = resultado.repetidas_bits | (1 << numero)
+
+        return resultado
+
+    def footprint(self, visitados: set[int] | None = None) -> Pegada:
+        '''
+        Quantos bytes a colecao ocupa (ver ed.Pegada): a sentinela fica no
+        container, cada No em nos e cada Figurinha em payload. A lista nao
+        reserva espaco, entao nao tem capacidade ociosa. Objetos em
+        *visitados* nao sao contados de novo.
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> c.adiciona_lote([1, 2, 2, 16])
+        >>> p = c.footprint()
+        >>> p.nos == 3 * tamanho_do_objeto(c.sentinela)
+        True
+        >>> p.capacidade_ociosa
+        0
+        >>> c.footprint({id(c)}).total()
+        0
+        '''
+        if visitados is None:
+            visitados = set()
+        if not conta_uma_vez(self, visitados):
+            return Pegada()
+
+        pegada = Pegada()
+        pegada.container = (tamanho_do_objeto(self)
+                            + tamanho_profundo(self.presentes_bits, visitados)
+                            + tamanho_profundo(self.repetidas_bits, visitados))
+        if conta_uma_vez(self.sentinela, visitados):
+            pegada.container = (pegada.container + tamanho_do_objeto(self.sentinela)
+                                + tamanho_profundo(self.sentinela.figurinha, visitados))
+
+        atual = self.sentinela.proximo
+        while atual is not None:
+            if conta_uma_vez(atual, visitados):
+                pegada.nos = pegada.nos + tamanho_do_objeto(atual)
+                pegada.payload = pegada.payload + tamanho_profundo(atual.figurinha, visitados)
+            atual = atual.proximo
+        return pegada
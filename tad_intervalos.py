@@ -0,0 +1,575 @@
+from __future__ import annotations
+import random
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, TextIO
+from album.figurinha import Figurinha
+
+
+@dataclass
+class Intervalo:
+    '''
+    Um no da arvore de intervalos: o intervalo [inicio, fim] e os dois
+    filhos. A arvore eh uma treap: em ordem pelos inicios, e a prioridade
+    de cada no eh maior que a dos filhos. Como as prioridades sao
+    sorteadas, a altura esperada da arvore eh O(log k) para k nos.
+    '''
+    inicio: int
+    fim: int
+    prioridade: float = field(default_factory=random.random)
+    esquerda: Intervalo | None = None
+    direita: Intervalo | None = None
+
+
+def divide(no: Intervalo | None, chave: int) -> tuple[Intervalo | None, Intervalo | None]:
+    '''
+    Separa a arvore *no* em duas: a dos intervalos que comecam antes de
+    *chave* e a do resto.
+    '''
+    if no is None:
+        return (None, None)
+    if no.inicio < chave:
+        menores, maiores = divide(no.direita, chave)
+        no.direita = menores
+        return (no, maiores)
+    menores, maiores = divide(no.esquerda, chave)
+    no.esquerda = maiores
+    return (menores, no)
+
+
+def junta(a: Intervalo | None, b: Intervalo | None) -> Intervalo | None:
+    '''
+    Junta duas arvores, onde todos os intervalos de *a* vem antes dos de *b*.
+    '''
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.prioridade > b.prioridade:
+        a.direita = junta(a.direita, b)
+        return a
+    b.esquerda = junta(a, b.esquerda)
+    return b
+
+
+def insere(raiz: Intervalo | None, novo: Intervalo) -> Intervalo | None:
+    menores, maiores = divide(raiz, novo.inicio)
+    return junta(junta(menores, novo), maiores)
+
+
+def retira(raiz: Intervalo | None, inicio: int) -> Intervalo | None:
+    menores, resto = divide(raiz, inicio)
+    _, maiores = divide(resto, inicio + 1)
+    return junta(menores, maiores)
+
+
+def anterior(raiz: Intervalo | None, numero: int) -> Intervalo | None:
+    '''
+    O intervalo com o maior inicio que nao passa de *numero*, ou None.
+    '''
+    melhor = None
+    no = raiz
+    while no is not None:
+        if no.inicio <= numero:
+            melhor = no
+            no = no.direita
+        else:
+            no = no.esquerda
+    return melhor
+
+
+def seguinte(raiz: Intervalo | None, numero: int) -> Intervalo | None:
+    '''
+    O intervalo com o menor inicio maior que *numero*, ou None.
+    '''
+    melhor = None
+    no = raiz
+    while no is not None:
+        if no.inicio > numero:
+            melhor = no
+            no = no.esquerda
+        else:
+            no = no.direita
+    return melhor
+
+
+class Colecao:
+    '''
+    Uma colecao de figurinhas guardada como intervalos de numeros.
+
+    As figurinhas que a colecao tem ficam em intervalos [inicio, fim]
+    (inclusive), sem intervalos encostados, guardados numa arvore
+    (*raiz*, veja Intervalo) ordenada pelo inicio. As quantidades maiores
+    que 1 sao excecoes, guardadas em *extras* (numero -> quantas a mais).
+
+    Um album quase completo vira poucos intervalos: com 700 figurinhas e
+    3 buracos sao 4 intervalos, em vez de 700 posicoes ou 697 nos. Achar
+    o intervalo de um numero, e tambem criar, juntar, dividir ou apagar
+    um intervalo, custa O(log k) esperado para k intervalos, porque so
+    mexe num caminho da arvore.
+
+    *presentes_bits* e *repetidas_bits* sao mantidos a cada adicao e
+    remocao, como nas outras colecoes.
+
+    Exemplos:
+    >>> c = Colecao()
+    >>> c.adiciona_lote(range(1, 701))
+    >>> for n in [10, 11, 500]:
+    ...     c.remove_numero(n)
+    >>> c.gera_intervalos()
+    '1-9, 12-499, 501-700'
+    >>> c.adiciona_numero(11)
+    >>> c.adiciona_numero(10)
+    >>> c.adiciona_numero(10)
+    >>> c.gera_intervalos()
+    '1-499, 501-700'
+    >>> c.gera_figurinhas_repetidas()
+    '10 (1)'
+    >>> c.gera_figurinhas_faltantes()
+    '500'
+    '''
+    raiz: Intervalo | None
+    extras: dict[int, int]
+    distintas: int
+    presentes_bits: int
+    repetidas_bits: int
+
+    def __init__(self):
+        '''
+        Cria uma colecao vazia, sem nenhum intervalo.
+
+        Exemplos:
+        >>> x = Colecao()
+        >>> x.raiz, x.extras
+        (None, {})
+        '''
+        self.raiz = None
+        self.extras = {}
+        self.distintas = 0
+        self.presentes_bits = 0
+        self.repetidas_bits = 0
+
+    def busca_intervalo(self, numero: int) -> Intervalo | None:
+        '''
+        O intervalo que contem *numero*, ou None se nenhum contem.
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> c.adiciona_lote([1, 2, 3, 7, 8])
+        >>> c.busca_intervalo(2).fim, c.busca_intervalo(8).inicio, c.busca_intervalo(5)
+        (3, 7, None)
+        '''
+        no = anterior(self.raiz, numero)
+        if no is not None and no.fim >= numero:
+            return no
+        return None
+
+    def itera_intervalos(self) -> Iterator[tuple[int, int]]:
+        '''
+        Percorre os intervalos em ordem, como pares (inicio, fim).
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> c.adiciona_lote([8, 1, 2, 3, 7, 20])
+        >>> list(c.itera_intervalos())
+        [(1, 3), (7, 8), (20, 20)]
+        '''
+        pilha = []
+        no = self.raiz
+        while len(pilha) > 0 or no is not None:
+            while no is not None:
+                pilha.append(no)
+                no = no.esquerda
+            no = pilha.pop()
+            yield (no.inicio, no.fim)
+            no = no.direita
+
+    def adiciona_figurinha(self, figurinha: Figurinha) -> None:
+        '''
+        Adiciona uma figurinha na colecao. Se ja tiver essa figurinha,
+        apenas aumenta a quantidade.
+
+        Exemplos:
+        >>> Album = Colecao()
+        >>> neymar = Figurinha(4)
+        >>> Album.adiciona_figurinha(neymar)
+        >>> Album.adiciona_figurinha(neymar)
+        >>> ronaldo = Figurinha(20)
+        >>> Album.adiciona_figurinha(ronaldo)
+        >>> Album.gera_figurinhas_presentes()
+        '4, 20'
+        '''
+        self.adiciona_numero(figurinha.numero)
+
+    def adiciona_numero(self, numero: int) -> None:
+        '''
+        Adiciona a figurinha *numero*. Se ela ja existe, vira uma excecao
+        em *extras*. Se nao, ela estende o intervalo vizinho, junta os dois
+        intervalos vizinhos ou vira um intervalo novo.
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> for n in [1, 3, 2, 5]:
+        ...     c.adiciona_numero(n)
+        >>> c.gera_intervalos()
+        '1-3, 5'
+        >>> c.adiciona_numero(2)
+        >>> c.presentes_bits == 0b101110, c.repetidas_bits == 0b100
+        (True, True)
+        >>> c.adiciona_numero(-1)
+        Traceback (most recent call last):
+        ...
+        ValueError: figurinha -1 fora do album
+        >>> c.adiciona_numero(0)
+        Traceback (most recent call last):
+        ...
+        ValueError: figurinha 0 fora do album
+        >>> c.gera_intervalos(), c.conta_faltantes()
+        ('1-3, 5', 1)
+        '''
+        if numero < 1:
+            raise ValueError('figurinha ' + str(numero) + ' fora do album')
+
+        esquerdo = anterior(self.raiz, numero)
+
+        if esquerdo is not None and esquerdo.fim >= numero:
+            self.extras[numero] = self.extras.get(numero, 0) + 1
+            self.repetidas_bits = self.repetidas_bits | (1 << numero)
+            return
+
+        direito = seguinte(self.raiz, numero)
+        junta_esquerda = esquerdo is not None and esquerdo.fim == numero - 1
+        junta_direita = direito is not None and direito.inicio == numero + 1
+
+        if junta_esquerda and junta_direita:
+            esquerdo.fim = direito.fim
+            self.raiz = retira(self.raiz, direito.inicio)
+        elif junta_esquerda:
+            esquerdo.fim = numero
+        elif junta_direita:
+            # O inicio continua depois do fim do intervalo anterior, entao
+            # a ordem da arvore nao muda.
+            direito.inicio = numero
+        else:
+            self.raiz = insere(self.raiz, Intervalo(numero, numero))
+
+        self.distintas = self.distintas + 1
+        self.presentes_bits = self.presentes_bits | (1 << numero)
+
+    def adiciona_lote(self, numeros: Iterable[int]) -> None:
+        for numero in numeros:
+            self.adiciona_numero(numero)
+
+    def remove_figurinha(self, figurinha: Figurinha) -> None:
+        '''
+        Remove uma figurinha da colecao. Se tiver mais de uma, so diminui
+        a quantidade. Se tiver apenas uma, remove completamente.
+        Se nao tiver a figurinha, nao faz nada.
+
+        Exemplos:
+        >>> copa = Colecao()
+        >>> fig1 = Figurinha(1)
+        >>> copa.adiciona_figurinha(fig1)
+        >>> copa.adiciona_figurinha(fig1)
+        >>> copa.remove_figurinha(fig1)
+        >>> copa.remove_figurinha(fig1)
+        >>> copa.gera_figurinhas_presentes()
+        ''
+        '''
+        self.remove_numero(figurinha.numero)
+
+    def remove_numero(self, numero: int) -> None:
+        '''
+        Remove a figurinha *numero*. Se ela for a ultima, o intervalo dela
+        encolhe, some ou se divide em dois.
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> c.adiciona_lote(range(1, 6))
+        >>> c.remove_numero(3)
+        >>> c.gera_intervalos()
+        '1-2, 4-5'
+        >>> c.remove_numero(1)
+        >>> c.remove_numero(5)
+        >>> c.remove_numero(9)
+        >>> c.gera_intervalos()
+        '2, 4'
+        >>> c.presentes_bits == 0b10100
+        True
+        '''
+        if numero in self.extras:
+            if self.extras[numero] > 1:
+                self.extras[numero] = self.extras[numero] - 1
+            else:
+                del self.extras[numero]
+                self.repetidas_bits = self.repetidas_bits & ~(1 << numero)
+            return
+
+        no = self.busca_intervalo(numero)
+        if no is None:
+            return
+
+        if no.inicio == no.fim:
+            self.raiz = retira(self.raiz, no.inicio)
+        elif numero == no.inicio:
+            no.inicio = numero + 1
+        elif numero == no.fim:
+            no.fim = numero - 1
+        else:
+            fim = no.fim
+            no.fim = numero - 1
+            self.raiz = insere(self.raiz, Intervalo(numero + 1, fim))
+
+        self.distintas = self.distintas - 1
+        self.presentes_bits = self.presentes_bits & ~(1 << numero)
+
+    def quantidade_de(self, numero: int) -> int:
+        if self.busca_intervalo(numero) is None:
+            return 0
+        return 1 + self.extras.get(numero, 0)
+
+    def itera_quantidades(self) -> Iterator[tuple[int, int]]:
+        '''
+        Percorre as figurinhas da colecao em ordem crescente, como pares
+        (numero, quantidade), direto dos intervalos.
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> c.adiciona_lote([3, 1, 3, 2])
+        >>> list(c.itera_quantidades())
+        [(1, 1), (2, 1), (3, 2)]
+        '''
+        for inicio, fim in self.itera_intervalos():
+            for numero in range(inicio, fim + 1):
+                yield (numero, 1 + self.extras.get(numero, 0))
+
+    def gera_intervalos(self) -> str:
+        '''
+        Retorna uma string com os intervalos da colecao, como '1-9, 12'.
+        '''
+        partes = []
+        for inicio, fim in self.itera_intervalos():
+            if inicio == fim:
+                partes.append(str(inicio))
+            else:
+                partes.append(str(inicio) + "-" + str(fim))
+        return ", ".join(partes)
+
+    def gera_figurinhas_presentes(self) -> str:
+        '''
+        Retorna uma string com os numeros das figurinhas que tem na colecao.
+
+        Exemplos:
+        >>> copa = Colecao()
+        >>> copa.adiciona_figurinha(Figurinha(1))
+        >>> copa.adiciona_figurinha(Figurinha(3))
+        >>> copa.adiciona_figurinha(Figurinha(5))
+        >>> copa.gera_figurinhas_presentes()
+        '1, 3, 5'
+        >>> vazia = Colecao()
+        >>> vazia.gera_figurinhas_presentes()
+        ''
+        '''
+        return ", ".join(str(numero)
+                         for inicio, fim in self.itera_intervalos()
+                         for numero in range(inicio, fim + 1))
+
+    def gera_figurinhas_repetidas(self) -> str:
+        '''
+        Retorna uma string com as figurinhas repetidas, mostrando quantas
+        a mais cada uma tem.
+
+        Exemplos:
+        >>> copa = Colecao()
+        >>> fig1 = Figurinha(1)
+        >>> fig2 = Figurinha(2)
+        >>> copa.adiciona_figurinha(fig1)
+        >>> copa.adiciona_figurinha(fig1)
+        >>> copa.adiciona_figurinha(fig1)
+        >>> copa.adiciona_figurinha(fig2)
+        >>> copa.adiciona_figurinha(fig2)
+        >>> copa.gera_figurinhas_repetidas()
+        '1 (2), 2 (1)'
+        >>> vazia = Colecao()
+        >>> vazia.gera_figurinhas_repetidas()
+        ''
+        '''
+        return ", ".join(str(numero) + " (" + str(self.extras[numero]) + ")" for numero in sorted(self.extras))
+
+    def tamanho_do_album(self) -> int:
+        '''
+        O maior numero de figurinha que a colecao tem.
+        '''
+        no = self.raiz
+        if no is None:
+            return 0
+        while no.direita is not None:
+            no = no.direita
+        return no.fim
+
+    def iter_faltantes(self) -> Iterator[int]:
+        '''
+        Percorre os numeros que faltam (de 1 ate tamanho_do_album), que sao
+        os buracos entre os intervalos.
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> c.adiciona_lote([2, 3, 6])
+        >>> list(c.iter_faltantes())
+        [1, 4, 5]
+        '''
+        proximo = 1
+        for inicio, fim in self.itera_intervalos():
+            for numero in range(proximo, inicio):
+                yield numero
+            proximo = fim + 1
+
+    def conta_faltantes(self) -> int:
+        return self.tamanho_do_album() - self.distintas
+
+    def escreve_figurinhas_faltantes(self, saida: TextIO) -> None:
+        separador = ""
+        for numero in self.iter_faltantes():
+            saida.write(separador + str(numero))
+            separador = ", "
+
+    def gera_figurinhas_faltantes(self) -> str:
+        return ", ".join(str(numero) for numero in self.iter_faltantes())
+
+    def conta_figurinhas_trocaveis(self, colecao_destino: Colecao) -> int:
+        """
+        Conta quantas figurinhas repetidas eu tenho que a outra pessoa nao tem.
+        So da pra trocar se eu tiver repetida e o outro nao tiver nenhuma.
+
+        Exemplos:
+        >>> c1 = Colecao()
+        >>> c1.adiciona_figurinha(Figurinha(1))
+        >>> c1.adiciona_figurinha(Figurinha(1))
+        >>> c1.adiciona_figurinha(Figurinha(2))
+        >>> c1.adiciona_figurinha(Figurinha(2))
+        >>> c2 = Colecao()
+        >>> c2.adiciona_figurinha(Figurinha(1))
+        >>> c2.adiciona_figurinha(Figurinha(3))
+        >>> c1.conta_figurinhas_trocaveis(c2)
+        1
+        >>> c2.conta_figurinhas_trocaveis(c1)
+        0
+        """
+        return (self.repetidas_bits & ~colecao_destino.presentes_bits).bit_count()
+
+    def proximo_numero_trocavel(self, colecao_destino: Colecao, indice_inicial: int) -> int:
+        '''
+        O menor numero, a partir de *indice_inicial*, que eu tenho
+        repetido e o destino nao tem, ou -1.
+        '''
+        trocaveis = (self.repetidas_bits & ~colecao_destino.presentes_bits) >> indice_inicial
+
+        if trocaveis == 0:
+            return -1
+        return (trocaveis & -trocaveis).bit_length() - 1 + indice_inicial
+
+    def encontra_proxima_figurinha_trocavel(self, colecao_destino: Colecao, indice_inicial: int) -> Figurinha:
+        """
+        Procura a proxima figurinha que da pra trocar, comecando de um numero.
+        Retorna a primeira figurinha repetida que o outro nao tem.
+
+        Exemplos:
+        >>> c1 = Colecao()
+        >>> c1.adiciona_figurinha(Figurinha(2))
+        >>> c1.adiciona_figurinha(Figurinha(2))
+        >>> c1.adiciona_figurinha(Figurinha(5))
+        >>> c1.adiciona_figurinha(Figurinha(5))
+        >>> c2 = Colecao()
+        >>> c2.adiciona_figurinha(Figurinha(1))
+        >>> fig = c1.encontra_proxima_figurinha_trocavel(c2, 0)
+        >>> fig.numero
+        2
+        >>> fig2 = c1.encontra_proxima_figurinha_trocavel(c2, 3)
+        >>> fig2.numero
+        5
+        >>> fig3 = c1.encontra_proxima_figurinha_trocavel(c2, 6)
+        >>> fig3.numero
+        0
+        """
+        numero = self.proximo_numero_trocavel(colecao_destino, indice_inicial)
+
+        if numero == -1:
+            return Figurinha(0)
+        return Figurinha(numero)
+
+    def troca_maxima(self, colecao2: Colecao) -> None:
+        """
+        Faz a troca de figurinhas entre duas colecoes. Cada um da figurinhas
+        repetidas que tem e que o outro ainda nao tem. A troca so acontece
+        se os dois tiverem algo pra trocar (interesse mutuo). As trocas sao
+        feitas em ordem crescente de numero.
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> c.adiciona_figurinha(Figurinha(2))
+        >>> c.adiciona_figurinha(Figurinha(2))
+        >>> c.adiciona_figurinha(Figurinha(4))
+        >>> c.adiciona_figurinha(Figurinha(4))
+        >>> c.adiciona_figurinha(Figurinha(7))
+        >>> c.adiciona_figurinha(Figurinha(7))
+        >>> c.adiciona_figurinha(Figurinha(1))
+        >>> c.adiciona_figurinha(Figurinha(1))
+        >>> d = Colecao()
+        >>> d.adiciona_figurinha(Figurinha(2))
+        >>> d.adiciona_figurinha(Figurinha(6))
+        >>> d.adiciona_figurinha(Figurinha(6))
+        >>> d.adiciona_figurinha(Figurinha(8))
+        >>> d.adiciona_figurinha(Figurinha(8))
+        >>> d.adiciona_figurinha(Figurinha(10))
+        >>> d.adiciona_figurinha(Figurinha(10))
+        >>> c.troca_maxima(d)
+        >>> c.gera_figurinhas_presentes()
+        '1, 2, 4, 6, 7, 8, 10'
+        >>> c.gera_figurinhas_repetidas()
+        '2 (1)'
+        >>> d.gera_figurinhas_presentes()
+        '1, 2, 4, 6, 7, 8, 10'
+        >>> d.gera_figurinhas_repetidas()
+        ''
+        """
+        numero_de_trocas = min(self.conta_figurinhas_trocaveis(colecao2), colecao2.conta_figurinhas_trocaveis(self))
+
+        trocas_realizadas = 0
+        indice_col1 = 0
+        indice_col2 = 0
+        continuar = True
+
+        while trocas_realizadas < numero_de_trocas and continuar:
+            numero_para_col2 = self.proximo_numero_trocavel(colecao2, indice_col1)
+            numero_para_col1 = colecao2.proximo_numero_trocavel(self, indice_col2)
+
+            if numero_para_col2 != -1 and numero_para_col1 != -1:
+                self.remove_numero(numero_para_col2)
+                colecao2.adiciona_numero(numero_para_col2)
+
+                colecao2.remove_numero(numero_para_col1)
+                self.adiciona_numero(numero_para_col1)
+
+                trocas_realizadas += 1
+                indice_col1 = numero_para_col2 + 1
+                indice_col2 = numero_para_col1 + 1
+            else:
+                continuar = False
+
+    def aplica_diff(self, deltas: list[tuple[int, int]]) -> None:
+        '''
+        Aplica diferencas (numero, delta) como as de tad.Colecao.gera_diff.
+        Uma quantidade nunca fica negativa.
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> c.aplica_diff([(1, 2), (2, 1), (3, 1), (2, -4)])
+        >>> c.gera_intervalos(), c.gera_figurinhas_repetidas()
+        ('1, 3', '1 (1)')
+        '''
+        for numero, delta in deltas:
+            if delta > 0:
+                for _ in range(delta):
+                    self.adiciona_numero(numero)
+            else:
+                for _ in range(min(-delta, self.quantidade_de(numero))):
+                    self.remove_numero(numero)
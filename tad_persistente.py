@@ -0,0 +1,395 @@
+from __future__ import annotations
+from typing import Iterator, Optional, Union
+from album.figurinha import Figurinha
+
+BITS_POR_NIVEL = 5
+RAMOS = 1 << BITS_POR_NIVEL
+
+# Um no da arvore eh uma tupla com RAMOS filhos. No ultimo nivel os filhos
+# sao as quantidades (ou None); nos outros, sao nos (ou None).
+No = tuple[Optional[Union['No', int]], ...]
+
+
+def troca_filho(no: No | None, nivel: int, numero: int, quantidade: int) -> No | None:
+    '''
+    Retorna uma copia de *no* onde a figurinha *numero* tem *quantidade*.
+    So os nos do caminho ate a folha sao copiados; os outros filhos sao
+    os mesmos objetos do no original. Nos que ficam vazios viram None.
+    '''
+    indice = (numero >> (BITS_POR_NIVEL * (nivel - 1))) & (RAMOS - 1)
+
+    if no is None:
+        no = (None,) * RAMOS
+
+    if nivel == 1:
+        novo_filho = quantidade if quantidade > 0 else None
+    else:
+        novo_filho = troca_filho(no[indice], nivel - 1, numero, quantidade)
+
+    novo = no[:indice] + (novo_filho,) + no[indice + 1:]
+    if novo_filho is None and novo.count(None) == RAMOS:
+        return None
+    return novo
+
+
+def percorre(no: No | None, nivel: int, base: int) -> Iterator[tuple[int, int]]:
+    '''
+    Percorre as folhas de *no* em ordem, como pares (numero, quantidade).
+    '''
+    if no is None:
+        return
+    passo = 1 << (BITS_POR_NIVEL * (nivel - 1))
+    for indice in range(RAMOS):
+        filho = no[indice]
+        if filho is not None:
+            if nivel == 1:
+                yield (base + indice, filho)
+            else:
+                yield from percorre(filho, nivel - 1, base + indice * passo)
+
+
+def primeiro_bit(bits: int, deslocamento: int) -> int:
+    '''
+    O menor bit ligado de *bits* mais *deslocamento*, ou -1 se nao tem.
+    '''
+    if bits == 0:
+        return -1
+    return (bits & -bits).bit_length() - 1 + deslocamento
+
+
+class Colecao:
+    '''
+    Uma colecao de figurinhas persistente: ela nunca muda. Adicionar ou
+    remover uma figurinha retorna uma versao nova, e a antiga continua
+    valendo e respondendo a todas as consultas.
+
+    As quantidades ficam numa arvore de RAMOS filhos por no, indexada
+    pelos bits do numero da figurinha (5 bits por nivel). Uma versao nova
+    so copia os nos do caminho da raiz ate a figurinha alterada (2 nos
+    para um album de 670 figurinhas) e compartilha todo o resto com a
+    versao anterior. Guardar uma versao por dia ou por troca custa
+    O(log n) de memoria, e nao uma copia do album inteiro.
+
+    Exemplos:
+    >>> v0 = Colecao()
+    >>> v1 = v0.adiciona_figurinha(Figurinha(3))
+    >>> v2 = v1.adiciona_figurinha(Figurinha(3)).adiciona_figurinha(Figurinha(100))
+    >>> v3 = v2.remove_figurinha(Figurinha(3))
+    >>> v1.gera_figurinhas_presentes(), v1.gera_figurinhas_repetidas()
+    ('3', '')
+    >>> v2.gera_figurinhas_presentes(), v2.gera_figurinhas_repetidas()
+    ('3, 100', '3 (1)')
+    >>> v3.gera_figurinhas_repetidas()
+    ''
+    >>> v0.gera_figurinhas_presentes()
+    ''
+    >>> v3.raiz[3] is v2.raiz[3]
+    True
+    '''
+    raiz: No | None
+    niveis: int
+    distintas: int
+
+    def __init__(self, raiz: No | None = None, niveis: int = 1, distintas: int = 0):
+        '''
+        Cria uma colecao vazia (ou uma versao com a arvore dada).
+
+        Exemplos:
+        >>> x = Colecao()
+        >>> x.raiz is None, x.niveis
+        (True, 1)
+        '''
+        self.raiz = raiz
+        self.niveis = niveis
+        self.distintas = distintas
+        self.cache_presentes: int | None = None
+        self.cache_repetidas: int | None = None
+
+    def com_quantidade(self, numero: int, quantidade: int) -> Colecao:
+        '''
+        Retorna uma versao onde a figurinha *numero* tem *quantidade*.
+        Se o numero nao cabe na arvore, ela ganha niveis em cima da raiz.
+        A versao nova comeca sem bits calculados (veja presentes_bits),
+        para nao carregar uma copia dos bits da versao anterior.
+
+        Exemplos:
+        >>> c = Colecao().adiciona_numero(3).adiciona_numero(3)
+        >>> c.presentes_bits == c.repetidas_bits == 1 << 3
+        True
+        >>> d = c.com_quantidade(5, 2)
+        >>> d.cache_presentes is None, d.cache_repetidas is None
+        (True, True)
+        >>> c.com_quantidade(-1, 1)
+        Traceback (most recent call last):
+        ...
+        ValueError: figurinha -1 fora do album
+        '''
+        if numero < 1:
+            raise ValueError('figurinha ' + str(numero) + ' fora do album')
+
+        raiz = self.raiz
+        niveis = self.niveis
+
+        while numero >= 1 << (BITS_POR_NIVEL * niveis):
+            if raiz is not None:
+                raiz = (raiz,) + (None,) * (RAMOS - 1)
+            niveis = niveis + 1
+
+        distintas = self.distintas
+        antes = self.quantidade_de(numero)
+        if antes == 0 and quantidade > 0:
+            distintas = distintas + 1
+        elif antes > 0 and quantidade == 0:
+            distintas = distintas - 1
+
+        return Colecao(troca_filho(raiz, niveis, numero, quantidade), niveis, distintas)
+
+    def quantidade_de(self, numero: int) -> int:
+        '''
+        Quantas figurinhas com esse numero a colecao tem.
+
+        Exemplos:
+        >>> c = Colecao().adiciona_numero(40).adiciona_numero(40)
+        >>> c.quantidade_de(40), c.quantidade_de(41), c.quantidade_de(10 ** 6)
+        (2, 0, 0)
+        '''
+        if numero < 0 or numero >= 1 << (BITS_POR_NIVEL * self.niveis):
+            return 0
+
+        no = self.raiz
+        nivel = self.niveis
+        while no is not None and nivel > 0:
+            no = no[(numero >> (BITS_POR_NIVEL * (nivel - 1))) & (RAMOS - 1)]
+            nivel = nivel - 1
+
+        if no is None:
+            return 0
+        return no
+
+    def adiciona_figurinha(self, figurinha: Figurinha) -> Colecao:
+        '''
+        Retorna uma versao com mais uma figurinha. Se ja tiver essa
+        figurinha, apenas aumenta a quantidade.
+
+        Exemplos:
+        >>> Album = Colecao()
+        >>> neymar = Figurinha(4)
+        >>> Album = Album.adiciona_figurinha(neymar)
+        >>> Album = Album.adiciona_figurinha(neymar)
+        >>> ronaldo = Figurinha(20)
+        >>> Album = Album.adiciona_figurinha(ronaldo)
+        >>> Album.gera_figurinhas_presentes()
+        '4, 20'
+        '''
+        return self.adiciona_numero(figurinha.numero)
+
+    def adiciona_numero(self, numero: int) -> Colecao:
+        return self.com_quantidade(numero, self.quantidade_de(numero) + 1)
+
+    def remove_figurinha(self, figurinha: Figurinha) -> Colecao:
+        '''
+        Retorna uma versao com uma figurinha a menos. Se nao tiver a
+        figurinha, retorna a propria versao.
+
+        Exemplos:
+        >>> copa = Colecao()
+        >>> fig1 = Figurinha(1)
+        >>> copa = copa.adiciona_figurinha(fig1)
+        >>> copa = copa.adiciona_figurinha(fig1)
+        >>> copa = copa.remove_figurinha(fig1)
+        >>> copa = copa.remove_figurinha(fig1)
+        >>> copa.gera_figurinhas_presentes()
+        ''
+        >>> copa.remove_figurinha(fig1) is copa
+        True
+        '''
+        return self.remove_numero(figurinha.numero)
+
+    def remove_numero(self, numero: int) -> Colecao:
+        quantidade = self.quantidade_de(numero)
+        if quantidade == 0:
+            return self
+        return self.com_quantidade(numero, quantidade - 1)
+
+    def itera_quantidades(self) -> Iterator[tuple[int, int]]:
+        '''
+        Percorre as figurinhas da versao em ordem crescente, como pares
+        (numero, quantidade).
+
+        Exemplos:
+        >>> c = Colecao().adiciona_numero(3).adiciona_numero(1).adiciona_numero(3)
+        >>> list(c.itera_quantidades())
+        [(1, 1), (3, 2)]
+        '''
+        return percorre(self.raiz, self.niveis, 0)
+
+    @property
+    def presentes_bits(self) -> int:
+        if self.cache_presentes is None:
+            bits = 0
+            for numero, _ in self.itera_quantidades():
+                bits = bits | (1 << numero)
+            self.cache_presentes = bits
+        return self.cache_presentes
+
+    @property
+    def repetidas_bits(self) -> int:
+        if self.cache_repetidas is None:
+            bits = 0
+            for numero, quantidade in self.itera_quantidades():
+                if quantidade > 1:
+                    bits = bits | (1 << numero)
+            self.cache_repetidas = bits
+        return self.cache_repetidas
+
+    def gera_figurinhas_presentes(self) -> str:
+        '''
+        Retorna uma string com os numeros das figurinhas que tem na colecao.
+
+        Exemplos:
+        >>> copa = Colecao()
+        >>> copa = copa.adiciona_figurinha(Figurinha(1))
+        >>> copa = copa.adiciona_figurinha(Figurinha(3))
+        >>> copa = copa.adiciona_figurinha(Figurinha(5))
+        >>> copa.gera_figurinhas_presentes()
+        '1, 3, 5'
+        >>> vazia = Colecao()
+        >>> vazia.gera_figurinhas_presentes()
+        ''
+        '''
+        return ", ".join(str(numero) for numero, _ in self.itera_quantidades())
+
+    def gera_figurinhas_repetidas(self) -> str:
+        '''
+        Retorna uma string com as figurinhas repetidas, mostrando quantas
+        a mais cada uma tem.
+
+        Exemplos:
+        >>> copa = Colecao()
+        >>> for n in [1, 1, 1, 2, 2]:
+        ...     copa = copa.adiciona_figurinha(Figurinha(n))
+        >>> copa.gera_figurinhas_repetidas()
+        '1 (2), 2 (1)'
+        >>> vazia = Colecao()
+        >>> vazia.gera_figurinhas_repetidas()
+        ''
+        '''
+        return ", ".join(str(numero) + " (" + str(quantidade - 1) + ")"
+                         for numero, quantidade in self.itera_quantidades() if quantidade > 1)
+
+    def tamanho_do_album(self) -> int:
+        return max(self.presentes_bits.bit_length() - 1, 0)
+
+    def iter_faltantes(self) -> Iterator[int]:
+        '''
+        Percorre os numeros que faltam, de 1 ate o maior que a versao tem.
+
+        Exemplos:
+        >>> c = Colecao().adiciona_numero(2).adiciona_numero(5)
+        >>> list(c.iter_faltantes())
+        [1, 3, 4]
+        '''
+        proximo = 1
+        for numero, _ in self.itera_quantidades():
+            yield from range(proximo, numero)
+            proximo = numero + 1
+
+    def conta_faltantes(self) -> int:
+        return self.tamanho_do_album() - self.distintas
+
+    def gera_figurinhas_faltantes(self) -> str:
+        return ", ".join(str(numero) for numero in self.iter_faltantes())
+
+    def conta_figurinhas_trocaveis(self, colecao_destino: Colecao) -> int:
+        """
+        Conta quantas figurinhas repetidas eu tenho que a outra pessoa nao tem.
+        So da pra trocar se eu tiver repetida e o outro nao tiver nenhuma.
+
+        Exemplos:
+        >>> c1 = Colecao()
+        >>> for n in [1, 1, 2, 2]:
+        ...     c1 = c1.adiciona_figurinha(Figurinha(n))
+        >>> c2 = Colecao()
+        >>> for n in [1, 3]:
+        ...     c2 = c2.adiciona_figurinha(Figurinha(n))
+        >>> c1.conta_figurinhas_trocaveis(c2)
+        1
+        >>> c2.conta_figurinhas_trocaveis(c1)
+        0
+        """
+        return (self.repetidas_bits & ~colecao_destino.presentes_bits).bit_count()
+
+    def proximo_numero_trocavel(self, colecao_destino: Colecao, indice_inicial: int) -> int:
+        trocaveis = (self.repetidas_bits & ~colecao_destino.presentes_bits) >> indice_inicial
+        return primeiro_bit(trocaveis, indice_inicial)
+
+    def encontra_proxima_figurinha_trocavel(self, colecao_destino: Colecao, indice_inicial: int) -> Figurinha:
+        numero = self.proximo_numero_trocavel(colecao_destino, indice_inicial)
+
+        if numero == -1:
+            return Figurinha(0)
+        return Figurinha(numero)
+
+    def troca_maxima(self, colecao2: Colecao) -> tuple[Colecao, Colecao]:
+        """
+        Faz a troca maxima de tad.Colecao.troca_maxima e retorna as novas
+        versoes das duas colecoes. As versoes de antes da troca continuam
+        iguais.
+
+        Exemplos:
+        >>> c = Colecao()
+        >>> for n in [2, 2, 4, 4, 7, 7, 1, 1]:
+        ...     c = c.adiciona_figurinha(Figurinha(n))
+        >>> d = Colecao()
+        >>> for n in [2, 6, 6, 8, 8, 10, 10]:
+        ...     d = d.adiciona_figurinha(Figurinha(n))
+        >>> c2, d2 = c.troca_maxima(d)
+        >>> c2.gera_figurinhas_presentes()
+        '1, 2, 4, 6, 7, 8, 10'
+        >>> c2.gera_figurinhas_repetidas()
+        '2 (1)'
+        >>> d2.gera_figurinhas_presentes()
+        '1, 2, 4, 6, 7, 8, 10'
+        >>> d2.gera_figurinhas_repetidas()
+        ''
+        >>> c.gera_figurinhas_repetidas()
+        '1 (1), 2 (1), 4 (1), 7 (1)'
+        """
+        numero_de_trocas = min(self.conta_figurinhas_trocaveis(colecao2), colecao2.conta_figurinhas_trocaveis(self))
+
+        # As versoes intermediarias nao guardam bits; os bits das duas
+        # colecoes ficam aqui e sao atualizados a cada troca.
+        presentes1, repetidas1 = self.presentes_bits, self.repetidas_bits
+        presentes2, repetidas2 = colecao2.presentes_bits, colecao2.repetidas_bits
+
+        col1 = self
+        col2 = colecao2
+        trocas_realizadas = 0
+        indice_col1 = 0
+        indice_col2 = 0
+        continuar = True
+
+        while trocas_realizadas < numero_de_trocas and continuar:
+            numero_para_col2 = primeiro_bit((repetidas1 & ~presentes2) >> indice_col1, indice_col1)
+            numero_para_col1 = primeiro_bit((repetidas2 & ~presentes1) >> indice_col2, indice_col2)
+
+            if numero_para_col2 != -1 and numero_para_col1 != -1:
+                col1 = col1.remove_numero(numero_para_col2).adiciona_numero(numero_para_col1)
+                col2 = col2.remove_numero(numero_para_col1).adiciona_numero(numero_para_col2)
+
+                # Quem da tinha a figurinha repetida e quem recebe nao tinha.
+                dada2, dada1 = 1 << numero_para_col2, 1 << numero_para_col1
+                if col1.quantidade_de(numero_para_col2) == 1:
+                    repetidas1 = repetidas1 & ~dada2
+                if col2.quantidade_de(numero_para_col1) == 1:
+                    repetidas2 = repetidas2 & ~dada1
+                presentes1 = presentes1 | dada1
+                presentes2 = presentes2 | dada2
+
+                trocas_realizadas += 1
+                indice_col1 = numero_para_col2 + 1
+                indice_col2 = numero_para_col1 + 1
+            else:
+                continuar = False
+
+        return (col1, col2)